@@ -2,12 +2,16 @@
 import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 
+from src.data_processing.incident_featurizer import IncidentFeaturizer
+from src.database.columnar_export import load_threats_table, table_to_matrix
+
 
 class ThreatDataProcessor:
     def __init__(self, config):
         self.config = config
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
+        self.featurizer = IncidentFeaturizer()
 
     def generate_sample_data(self, n_samples=1000):
         """Generate sample training data"""
@@ -21,4 +25,20 @@ class ThreatDataProcessor:
     def preprocess_data(self, features, labels):
         features_scaled = self.scaler.fit_transform(features)
         labels_encoded = self.label_encoder.fit_transform(labels)
-        return features_scaled, labels_encoded
\ No newline at end of file
+        return features_scaled, labels_encoded
+
+    def load_columnar_data(self, path, feature_columns, label_column):
+        """Load features and labels from a Parquet/Arrow export without building per-row dicts"""
+        table = load_threats_table(path, columns=list(feature_columns) + [label_column])
+        features = table_to_matrix(table, feature_columns)
+        labels = table.column(label_column).to_numpy(zero_copy_only=False)
+        return features, labels
+
+    def featurize_incidents(self, incidents):
+        """Raw simulator/API incident dicts -> the 50-column float32 matrix the model is trained on"""
+        return self.featurizer.transform(incidents)
+
+    def incident_training_data(self, incidents):
+        """Features and threat_type labels straight from raw incidents"""
+        labels = np.array([incident.get('threat_type', 'unknown') for incident in incidents], dtype=object)
+        return self.featurize_incidents(incidents), labels
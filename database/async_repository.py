@@ -0,0 +1,269 @@
+# src/database/async_repository.py
+import asyncio
+import queue
+import threading
+import time
+
+from src.database.threat_repository import ThreatRepository, INSERT_THREAT_SQL, threat_params
+
+_STOP = object()
+
+
+def _resolve(future, result=None, error=None):
+    """Complete a future on its own loop, ignoring callers that already gave up"""
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _complete(future, result=None, error=None):
+    """Hand a result from the DB thread back to the future's event loop"""
+    try:
+        future.get_loop().call_soon_threadsafe(_resolve, future, result, error)
+    except RuntimeError:
+        # The caller's loop has already closed; nobody is waiting for this result
+        pass
+
+
+class AsyncThreatRepository:
+    """asyncio facade over ThreatRepository; every SQLite call runs on one dedicated DB thread.
+
+    The constructor blocks until the repository has initialised (schema,
+    FTS rebuild, day-version backfill); inside a running loop use
+    `await AsyncThreatRepository.open(...)` instead.
+    """
+
+    def __init__(self, db_path='threat_intelligence.db', batch_size=256, wait=True):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.requests = queue.SimpleQueue()
+        self.stats = {'batches': 0, 'writes': 0, 'largest_batch': 0}
+        self.closed = False
+
+        self._ready = threading.Event()
+        self._startup_error = None
+        self.thread = threading.Thread(target=self._run, name='threat-db', daemon=True)
+        self.thread.start()
+        if wait:
+            self._wait_ready()
+
+    @classmethod
+    async def open(cls, db_path='threat_intelligence.db', batch_size=256):
+        """Create the facade from async code; initialisation is awaited, not waited for on the loop"""
+        repo = cls(db_path, batch_size, wait=False)
+        await asyncio.get_running_loop().run_in_executor(None, repo._wait_ready)
+        return repo
+
+    def _wait_ready(self):
+        self._ready.wait()
+        if self._startup_error:
+            self.closed = True
+            raise self._startup_error
+
+    # Event-loop side -----------------------------------------------------
+
+    def _submit(self, op, payload):
+        if self.closed or not self.thread.is_alive():
+            raise RuntimeError(f"AsyncThreatRepository for {self.db_path} is closed")
+        future = asyncio.get_running_loop().create_future()
+        # SimpleQueue.put never blocks, so the event loop never waits on the DB thread
+        self.requests.put((op, payload, future))
+        return future
+
+    async def log_threat(self, threat_data):
+        """Log a threat; concurrent calls are committed together in one transaction"""
+        return await self._submit('log', threat_data)
+
+    async def get_recent_threats(self, limit=10):
+        return await self._submit('call', ('get_recent_threats', (limit,)))
+
+    async def get_threats_between(self, start, end, limit=None):
+        return await self._submit('call', ('get_threats_between', (start, end, limit)))
+
+    async def get_threat_statistics(self):
+        return await self._submit('call', ('get_threat_statistics', ()))
+
+    async def search_threats(self, query, filters=None, limit=20):
+        return await self._submit('call', ('search_threats', (query, filters, limit)))
+
+    async def iter_threats(self, start=None, end=None, chunk_size=500):
+        """Stream threats in id order, fetching the next page while the caller consumes this one"""
+        pending = self._submit('call', ('get_threats_page', (0, chunk_size, start, end)))
+        while True:
+            page = await pending
+            if not page:
+                return
+            if len(page) == chunk_size:
+                pending = self._submit('call', ('get_threats_page', (page[-1]['id'], chunk_size, start, end)))
+            else:
+                pending = None
+            for threat in page:
+                yield threat
+            if pending is None:
+                return
+
+    async def close(self):
+        """Drain outstanding requests and close the DB thread; later calls raise RuntimeError"""
+        if self.closed:
+            return
+        if self.thread.is_alive():
+            stop = self._submit(_STOP, None)
+            self.closed = True
+            await stop
+            await asyncio.get_running_loop().run_in_executor(None, self.thread.join)
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # DB-thread side ------------------------------------------------------
+
+    def _run(self):
+        try:
+            self.repository = ThreatRepository(self.db_path)
+        except Exception as e:
+            self._startup_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        running = True
+        while running:
+            batch = [self.requests.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+            running = not any(op is _STOP for op, _, _ in batch)
+
+        self.repository.close()
+        # Requests that raced past the closed check still get an answer
+        while True:
+            try:
+                _, _, future = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            _complete(future, error=RuntimeError(f"AsyncThreatRepository for {self.db_path} is closed"))
+
+    def _process(self, batch):
+        """Execute one drained batch: all writes share a commit, reads run in arrival order"""
+        writes = [(payload, future) for op, payload, future in batch if op == 'log']
+        if writes:
+            self._write_batch(writes)
+
+        for op, payload, future in batch:
+            if op == 'call':
+                method, args = payload
+                try:
+                    result, error = getattr(self.repository, method)(*args), None
+                except Exception as e:
+                    result, error = None, e
+                _complete(future, result, error)
+            elif op is _STOP:
+                _complete(future)
+
+    def _write_batch(self, writes):
+        outcomes = []
+        conn = self.repository.conn
+        try:
+            with conn:
+                for threat_data, future in writes:
+                    try:
+                        row_id = conn.execute(INSERT_THREAT_SQL, threat_params(threat_data)).lastrowid
+                        outcomes.append((future, row_id, None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            outcomes = [(future, None, e) for _, future in writes]
+
+        self.stats['batches'] += 1
+        self.stats['writes'] += len(writes)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(writes))
+        for future, row_id, error in outcomes:
+            _complete(future, row_id, error)
+
+
+class LoopLagMonitor:
+    """Measure event-loop lag as the overshoot of a periodic asyncio.sleep"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return self.summary()
+
+    def summary(self):
+        if not self.samples:
+            return {'samples': 0, 'max_ms': 0.0, 'p99_ms': 0.0, 'mean_ms': 0.0}
+        ordered = sorted(self.samples)
+        return {
+            'samples': len(ordered),
+            'max_ms': ordered[-1] * 1000,
+            'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+            'mean_ms': sum(ordered) / len(ordered) * 1000
+        }
+
+
+async def _demo(db_path='async_demo.db', n_threats=20000):
+    monitor = LoopLagMonitor()
+    monitor.start()
+
+    async with await AsyncThreatRepository.open(db_path) as repo:
+        started = time.perf_counter()
+        # Waves of concurrent requests, as a busy /detect-threat service would issue them
+        for wave in range(0, n_threats, 500):
+            await asyncio.gather(*(repo.log_threat({
+                'type': 'DDoS',
+                'severity': 'HIGH',
+                'source_ip': f"196.201.0.{i % 250}",
+                'description': 'Virtual court flood',
+                'confidence': 0.9
+            }) for i in range(wave, min(wave + 500, n_threats))))
+        elapsed = time.perf_counter() - started
+
+        streamed = 0
+        async for _ in repo.iter_threats(chunk_size=1000):
+            streamed += 1
+
+        print(f"✅ Logged {n_threats:,} threats in {elapsed:.2f}s "
+              f"({repo.stats['batches']} batches, largest {repo.stats['largest_batch']})")
+        print(f"📋 Streamed {streamed:,} threats with iter_threats")
+
+    try:
+        await repo.get_recent_threats()
+    except RuntimeError as e:
+        print(f"🔒 After close: {e}")
+
+    lag = await monitor.stop()
+    print(f"⏱️ Event loop lag: max {lag['max_ms']:.2f}ms, p99 {lag['p99_ms']:.2f}ms over {lag['samples']} samples")
+
+
+# Test the async repository
+if __name__ == "__main__":
+    asyncio.run(_demo())
@@ -0,0 +1,317 @@
+# src/database/incident_store.py
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from src.database.threat_repository import ThreatRepository, epoch_to_timestamp, to_epoch
+
+INCIDENT_STATUSES = ('open', 'contained', 'resolved')
+
+# Incidents only move forward; an open incident may be resolved without being contained first
+ALLOWED_TRANSITIONS = {
+    'open': {'contained', 'resolved'},
+    'contained': {'resolved'},
+    'resolved': set()
+}
+
+UPSERT_INCIDENT_SQL = '''
+    INSERT INTO incidents (incident_id, status, category, opened_at, updated_at, contained_at, resolved_at,
+                           event_count, max_severity_score, threat_data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (incident_id) DO UPDATE SET
+        status = excluded.status,
+        updated_at = excluded.updated_at,
+        contained_at = excluded.contained_at,
+        resolved_at = excluded.resolved_at,
+        event_count = excluded.event_count,
+        max_severity_score = excluded.max_severity_score
+    '''
+
+
+def _optional_timestamp(epoch):
+    return epoch_to_timestamp(epoch) if epoch is not None else None
+
+
+class IncidentStore:
+    """Indexed incident registry with batched persistence to the incidents table.
+
+    Incidents are held in a hash index by id, one insertion-ordered dict
+    per status (so a transition is two O(1) dict operations) and a deque
+    in opening order for recent-incident queries. Changes are buffered
+    and upserted in batches, when `batch_size` changes are pending or
+    from a background thread every `flush_interval` seconds; an atexit
+    hook writes whatever is left. Resolved incidents beyond `max_resolved`
+    are evicted from memory oldest-first; they stay in SQLite.
+    """
+
+    def __init__(self, repository=None, db_path='threat_intelligence.db', batch_size=200, flush_interval=5.0,
+                 max_resolved=10000, clock=time.time):
+        # A repository passed in belongs to the caller and stays open on close()
+        self.owns_repository = repository is None
+        self.repository = repository or ThreatRepository(db_path)
+        # Own connection: flushes from the timer thread must not share transactions with the repository's writes
+        self.conn = sqlite3.connect(self.repository.db_path, check_same_thread=False, timeout=30.0)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_resolved = max_resolved
+        self.clock = clock
+
+        self.lock = threading.RLock()
+        self.by_id = {}
+        self.by_status = {status: {} for status in INCIDENT_STATUSES}
+        self.timeline = deque()
+        self.dirty = {}
+        self.last_flush = time.monotonic()
+        self.closed = False
+        self.create_tables()
+
+        # Quiet periods still reach SQLite; the thread is a daemon, so exit relies on the atexit flush
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_periodically, name='incident-flush', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def create_tables(self):
+        """Create the incidents table and its status/time index"""
+        self.conn.execute('''
+                          CREATE TABLE IF NOT EXISTS incidents
+                          (
+                              incident_id TEXT PRIMARY KEY,
+                              status TEXT NOT NULL,
+                              category TEXT,
+                              opened_at DATETIME NOT NULL,
+                              updated_at DATETIME NOT NULL,
+                              contained_at DATETIME,
+                              resolved_at DATETIME,
+                              event_count INTEGER NOT NULL DEFAULT 1,
+                              max_severity_score REAL,
+                              threat_data TEXT
+                          ) WITHOUT ROWID
+                          ''')
+        self.conn.execute('''
+                          CREATE INDEX IF NOT EXISTS idx_incidents_status_opened
+                              ON incidents (status, opened_at)
+                          ''')
+        self.conn.commit()
+
+    # Indexes ----------------------------------------------------------------
+
+    def add(self, incident):
+        """Register a new incident (a correlator record or any dict with an incident_id)"""
+        with self.lock:
+            incident.setdefault('status', 'open')
+            incident.setdefault('opened_at', self.clock())
+            incident_id = incident['incident_id']
+            self.by_id[incident_id] = incident
+            self.by_status[incident['status']][incident_id] = incident
+            self.timeline.append((incident['opened_at'], incident_id))
+            self._mark_dirty(incident)
+        return incident
+
+    def touch(self, incident):
+        """Queue an incident whose counters changed (e.g. a correlated event) for the next flush"""
+        with self.lock:
+            if incident['incident_id'] in self.by_id:
+                self._mark_dirty(incident)
+
+    def get(self, incident_id):
+        return self.by_id.get(incident_id)
+
+    def with_status(self, status):
+        """Incidents currently in a status, oldest first"""
+        with self.lock:
+            return list(self.by_status[status].values())
+
+    def counts(self):
+        with self.lock:
+            return {status: len(incidents) for status, incidents in self.by_status.items()}
+
+    def recent(self, minutes=60, status='open', now=None):
+        """Incidents opened in the last N minutes, newest first; status=None returns every status"""
+        cutoff = (self.clock() if now is None else now) - minutes * 60
+        with self.lock:
+            incidents = []
+            for opened_at, incident_id in reversed(self.timeline):
+                if opened_at < cutoff:
+                    break
+                incident = self.by_id.get(incident_id)
+                if incident is not None and (status is None or incident['status'] == status):
+                    incidents.append(incident)
+            return incidents
+
+    def transition(self, incident_id, status, at=None):
+        """Move an incident along open -> contained -> resolved; raises ValueError on an invalid move"""
+        if status not in ALLOWED_TRANSITIONS:
+            raise ValueError(f"Unknown incident status {status!r}; use one of {INCIDENT_STATUSES}")
+        with self.lock:
+            incident = self.by_id.get(incident_id)
+            if incident is None:
+                raise KeyError(f"No incident {incident_id} in memory")
+            current = incident['status']
+            if status not in ALLOWED_TRANSITIONS[current]:
+                raise ValueError(f"Cannot move incident {incident_id} from {current} to {status}")
+
+            del self.by_status[current][incident_id]
+            self.by_status[status][incident_id] = incident
+            incident['status'] = status
+            incident[f'{status}_at'] = self.clock() if at is None else to_epoch(at)
+            self._mark_dirty(incident)
+            if status == 'resolved':
+                self._evict_resolved()
+            return incident
+
+    def _evict_resolved(self):
+        resolved = self.by_status['resolved']
+        while len(resolved) > self.max_resolved:
+            # A pending change keeps its own reference in self.dirty, so eviction needs no flush
+            incident_id = next(iter(resolved))
+            del resolved[incident_id]
+            del self.by_id[incident_id]
+        # Timeline entries for evicted incidents are skipped by recent() and trimmed here
+        while self.timeline and self.timeline[0][1] not in self.by_id:
+            self.timeline.popleft()
+
+    # Persistence --------------------------------------------------------------
+
+    def _mark_dirty(self, incident):
+        incident['updated_at'] = self.clock()
+        self.dirty[incident['incident_id']] = incident
+        if len(self.dirty) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def _row(self, incident):
+        return (
+            incident['incident_id'],
+            incident['status'],
+            incident.get('category'),
+            epoch_to_timestamp(incident['opened_at']),
+            epoch_to_timestamp(incident['updated_at']),
+            _optional_timestamp(incident.get('contained_at')),
+            _optional_timestamp(incident.get('resolved_at')),
+            incident.get('event_count', 1),
+            incident.get('max_severity_score'),
+            json.dumps(incident.get('threat_data'), default=str)
+        )
+
+    def flush(self):
+        """Upsert every changed incident in one transaction; returns how many were written"""
+        with self.lock:
+            pending, self.dirty = self.dirty, {}
+            self.last_flush = time.monotonic()
+            if not pending:
+                return 0
+            try:
+                with self.conn:
+                    self.conn.executemany(UPSERT_INCIDENT_SQL, [self._row(i) for i in pending.values()])
+                return len(pending)
+            except Exception as e:
+                # Keep the changes for the next attempt rather than losing them
+                pending.update(self.dirty)
+                self.dirty = pending
+                print(f"❌ Failed to persist {len(pending)} incidents: {e}")
+                return 0
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            if self.dirty:
+                self.flush()
+
+    def load(self, statuses=('open', 'contained')):
+        """Rebuild the in-memory indexes from SQLite, e.g. after a restart; returns the count loaded"""
+        placeholders = ', '.join('?' for _ in statuses)
+        try:
+            cursor = self.conn.execute(f'''
+                SELECT incident_id, status, category, opened_at, updated_at, contained_at, resolved_at,
+                       event_count, max_severity_score, threat_data
+                FROM incidents
+                WHERE status IN ({placeholders})
+                ORDER BY opened_at, incident_id
+                ''', tuple(statuses))
+            rows = cursor.fetchall()
+        except Exception as e:
+            print(f"❌ Failed to load incidents: {e}")
+            return 0
+
+        with self.lock:
+            for (incident_id, status, category, opened_at, updated_at, contained_at, resolved_at,
+                 event_count, max_severity_score, threat_data) in rows:
+                if incident_id in self.by_id:
+                    continue
+                incident = {
+                    'incident_id': incident_id,
+                    'status': status,
+                    'category': category,
+                    'opened_at': to_epoch(opened_at),
+                    'updated_at': to_epoch(updated_at),
+                    'contained_at': to_epoch(contained_at) if contained_at else None,
+                    'resolved_at': to_epoch(resolved_at) if resolved_at else None,
+                    'event_count': event_count,
+                    'max_severity_score': max_severity_score,
+                    'threat_data': json.loads(threat_data) if threat_data else None
+                }
+                incident['timestamp'] = epoch_to_timestamp(incident['opened_at'])
+                self.by_id[incident_id] = incident
+                self.by_status[status][incident_id] = incident
+                self.timeline.append((incident['opened_at'], incident_id))
+        return len(rows)
+
+    def close(self):
+        """Stop the flush thread, write pending changes and close the store's connection.
+
+        The repository is closed too when the store opened it.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        atexit.unregister(self.close)
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        with self.lock:
+            self.conn.close()
+        if self.owns_repository:
+            self.repository.close()
+
+
+# Test the incident store
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'incidents.db')
+    store = IncidentStore(db_path=db_path, max_resolved=5000)
+    start = 1700000000.0
+    n_incidents = 50000
+
+    started = time.perf_counter()
+    for i in range(n_incidents):
+        store.add({'incident_id': f"INC-{i:06d}", 'category': random.choice(['ddos', 'phishing', 'ransomware']),
+                   'opened_at': start + i * 6, 'threat_data': {'severity_score': random.random()}})
+    added = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(0, n_incidents, 2):
+        store.transition(f"INC-{i:06d}", 'contained', start + i * 6 + 60)
+    for i in range(0, n_incidents, 4):
+        store.transition(f"INC-{i:06d}", 'resolved', start + i * 6 + 600)
+    moved = time.perf_counter() - started
+    store.close()
+
+    now = start + n_incidents * 6
+    started = time.perf_counter()
+    recent = store.recent(minutes=30, now=now)
+    lookup = time.perf_counter() - started
+
+    print(f"🗂️ {n_incidents:,} incidents: add {added / n_incidents * 1e6:.1f}µs, "
+          f"transition {moved / (n_incidents * 3 // 4) * 1e6:.1f}µs (including batched writes)")
+    print(f"⏱️ Open in the last 30 minutes: {len(recent)} in {lookup * 1e6:.0f}µs; in memory: {store.counts()}")
+
+    reloaded = IncidentStore(db_path=db_path)
+    print(f"💾 Reloaded {reloaded.load()} unresolved incidents from SQLite; counts {reloaded.counts()}")
+    print("📋 Persisted:", dict(reloaded.conn.execute("SELECT status, COUNT(*) FROM incidents GROUP BY status")))
+    reloaded.close()
@@ -0,0 +1,267 @@
+# src/database/metrics_store.py
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+
+from src.database.threat_repository import ThreatRepository, epoch_to_timestamp, to_epoch
+from src.database.quantile_sketch import DDSketch
+
+# Rollup tables and their bucket width in seconds, finest first
+ROLLUPS = [('1m', 60), ('1h', 3600)]
+
+# Latency series served as percentiles by the reporter
+DETECTION_LATENCY_METRIC = 'detection_latency_ms'
+RESPONSE_LATENCY_METRIC = 'response_time_seconds'
+
+
+class MetricsStore:
+    """Batched system_metrics writer with min/max/avg/count rollups at 1m and 1h.
+
+    Each rollup bucket also stores a DDSketch of its (non-negative) samples,
+    so percentiles over any window come from merging bucket sketches. The
+    store writes through its own connection to the repository's database,
+    serialised by its lock, so it never shares a connection with
+    ThreatRepository's callers.
+    """
+
+    def __init__(self, repository=None, db_path='threat_intelligence.db', batch_size=500, flush_interval=5.0,
+                 raw_retention=timedelta(days=2), minute_retention=timedelta(days=30), max_points=1000,
+                 sketch_accuracy=0.01):
+        self.repository = repository or ThreatRepository(db_path)
+        self.conn = sqlite3.connect(self.repository.db_path, check_same_thread=False, timeout=30.0)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.raw_retention = raw_retention
+        self.minute_retention = minute_retention
+        self.max_points = max_points
+        self.sketch_accuracy = sketch_accuracy
+
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.create_tables()
+
+    def create_tables(self):
+        """Create rollup tables and the raw-series index"""
+        self.conn.execute('''
+                          CREATE INDEX IF NOT EXISTS idx_system_metrics_name_time
+                              ON system_metrics (metric_name, timestamp)
+                          ''')
+        for name, _ in ROLLUPS:
+            self.conn.execute(f'''
+                              CREATE TABLE IF NOT EXISTS system_metrics_{name}
+                              (
+                                  metric_name TEXT NOT NULL,
+                                  bucket INTEGER NOT NULL,
+                                  count INTEGER NOT NULL,
+                                  total REAL NOT NULL,
+                                  min_value REAL NOT NULL,
+                                  max_value REAL NOT NULL,
+                                  sketch BLOB,
+                                  PRIMARY KEY (metric_name, bucket)
+                              ) WITHOUT ROWID
+                              ''')
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info(system_metrics_{name})")]
+            if 'sketch' not in columns:
+                # Rollups created before sketches existed; old buckets keep a NULL sketch
+                self.conn.execute(f"ALTER TABLE system_metrics_{name} ADD COLUMN sketch BLOB")
+        self.conn.commit()
+
+    def record(self, name, value, timestamp=None):
+        """Buffer one metric sample; flushes when the batch is full or the interval has passed"""
+        with self.lock:
+            self.buffer.append((name, float(value), to_epoch(timestamp)))
+            due = (len(self.buffer) >= self.batch_size or
+                   time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered samples to the raw table and upsert them into every rollup"""
+        with self.lock:
+            samples, self.buffer = self.buffer, []
+            self.last_flush = time.monotonic()
+            if not samples:
+                return 0
+
+            try:
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT INTO system_metrics (metric_name, metric_value, timestamp) VALUES (?, ?, ?)",
+                        [(name, value, epoch_to_timestamp(ts)) for name, value, ts in samples]
+                    )
+                    for rollup, width in ROLLUPS:
+                        self.conn.executemany(f'''
+                            INSERT INTO system_metrics_{rollup}
+                                (metric_name, bucket, count, total, min_value, max_value, sketch)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (metric_name, bucket) DO UPDATE SET
+                                count = count + excluded.count,
+                                total = total + excluded.total,
+                                min_value = MIN(min_value, excluded.min_value),
+                                max_value = MAX(max_value, excluded.max_value),
+                                sketch = excluded.sketch
+                            ''', self._merge_sketches(rollup, self._aggregate(samples, width)))
+            except Exception as e:
+                # Keep the samples for the next flush rather than losing them
+                self.buffer[:0] = samples
+                print(f"❌ Failed to flush {len(samples)} metric samples: {e}")
+                return 0
+
+            return len(samples)
+
+    def _aggregate(self, samples, width):
+        """Pre-aggregate a batch into (name, bucket, count, total, min, max, sketch) rows"""
+        buckets = {}
+        for name, value, ts in samples:
+            key = (name, int(ts // width) * width)
+            agg = buckets.get(key)
+            if agg is None:
+                agg = buckets[key] = [0, 0.0, value, value, DDSketch(self.sketch_accuracy)]
+            agg[0] += 1
+            agg[1] += value
+            if value < agg[2]:
+                agg[2] = value
+            if value > agg[3]:
+                agg[3] = value
+            if value >= 0:
+                agg[4].add(value)
+        return [(name, bucket, *agg) for (name, bucket), agg in buckets.items()]
+
+    def _merge_sketches(self, rollup, rows):
+        """Fold each bucket's stored sketch into the batch's and serialise it for the upsert.
+
+        Sketches cannot be merged in SQL, so this is a read-modify-write; it is
+        safe because flushes are serialised by self.lock on a single writer.
+        """
+        merged = []
+        for name, bucket, count, total, min_value, max_value, sketch in rows:
+            row = self.conn.execute(f"SELECT sketch FROM system_metrics_{rollup} WHERE metric_name = ? AND bucket = ?",
+                                    (name, bucket)).fetchone()
+            if row and row[0]:
+                sketch.merge(DDSketch.from_bytes(row[0]))
+            merged.append((name, bucket, count, total, min_value, max_value, sketch.to_bytes()))
+        return merged
+
+    def choose_resolution(self, start, end, now=None):
+        """Pick the finest resolution that is retained for the window and fits max_points"""
+        now = to_epoch(now)
+        span = end - start
+        if start >= now - self.raw_retention.total_seconds() and span <= 3600:
+            return 'raw'
+        if start >= now - self.minute_retention.total_seconds() and span / 60 <= self.max_points:
+            return '1m'
+        return '1h'
+
+    def query(self, name, start, end=None, resolution=None):
+        """Get a metric series for [start, end) at the given or automatically chosen resolution"""
+        self.flush()
+        start, end = to_epoch(start), to_epoch(end)
+        resolution = resolution or self.choose_resolution(start, end)
+
+        with self.lock:
+            try:
+                if resolution == 'raw':
+                    cursor = self.conn.execute('''
+                        SELECT timestamp, metric_value
+                        FROM system_metrics
+                        WHERE metric_name = ? AND timestamp >= ? AND timestamp < ?
+                        ORDER BY timestamp
+                        ''', (name, epoch_to_timestamp(start), epoch_to_timestamp(end)))
+                    points = [{'timestamp': ts, 'count': 1, 'min': value, 'max': value, 'avg': value}
+                              for ts, value in cursor]
+                else:
+                    width = dict(ROLLUPS)[resolution]
+                    cursor = self.conn.execute(f'''
+                        SELECT bucket, count, total, min_value, max_value
+                        FROM system_metrics_{resolution}
+                        WHERE metric_name = ? AND bucket >= ? AND bucket < ?
+                        ORDER BY bucket
+                        ''', (name, int(start // width) * width, end))
+                    points = [{'timestamp': epoch_to_timestamp(bucket), 'count': count,
+                               'min': min_value, 'max': max_value, 'avg': total / count}
+                              for bucket, count, total, min_value, max_value in cursor]
+            except Exception as e:
+                print(f"❌ Failed to query metric {name}: {e}")
+                points = []
+
+        return {'metric': name, 'resolution': resolution, 'points': points}
+
+    def percentiles(self, name, start, end=None, qs=(0.5, 0.95, 0.99), resolution=None):
+        """Get percentiles of a metric over [start, end) by merging per-bucket sketches.
+
+        Rollup windows are aligned to whole buckets, like query(). Values are
+        within the sketch's relative accuracy (1% by default).
+        """
+        self.flush()
+        start, end = to_epoch(start), to_epoch(end)
+        resolution = resolution or self.choose_resolution(start, end)
+        sketch = DDSketch(self.sketch_accuracy)
+
+        with self.lock:
+            try:
+                if resolution == 'raw':
+                    cursor = self.conn.execute('''
+                        SELECT metric_value
+                        FROM system_metrics
+                        WHERE metric_name = ? AND timestamp >= ? AND timestamp < ? AND metric_value >= 0
+                        ''', (name, epoch_to_timestamp(start), epoch_to_timestamp(end)))
+                    sketch.update([value for value, in cursor])
+                else:
+                    width = dict(ROLLUPS)[resolution]
+                    cursor = self.conn.execute(f'''
+                        SELECT sketch
+                        FROM system_metrics_{resolution}
+                        WHERE metric_name = ? AND bucket >= ? AND bucket < ? AND sketch IS NOT NULL
+                        ''', (name, int(start // width) * width, end))
+                    for blob, in cursor:
+                        sketch.merge(DDSketch.from_bytes(blob))
+            except Exception as e:
+                print(f"❌ Failed to compute percentiles for {name}: {e}")
+
+        return {'metric': name, 'resolution': resolution, 'count': sketch.count,
+                'percentiles': sketch.percentiles(qs)}
+
+    def prune(self, now=None):
+        """Delete raw samples and 1m buckets that have aged out of their retention"""
+        self.flush()
+        now = to_epoch(now)
+        raw_cutoff = epoch_to_timestamp(now - self.raw_retention.total_seconds())
+        minute_cutoff = int(now - self.minute_retention.total_seconds())
+
+        with self.lock, self.conn:
+            names = [row[0] for row in self.conn.execute("SELECT DISTINCT metric_name FROM system_metrics_1h")]
+            # Per-name deletes keep both statements on their (metric_name, time) indexes
+            for name in names:
+                self.conn.execute("DELETE FROM system_metrics WHERE metric_name = ? AND timestamp < ?",
+                                  (name, raw_cutoff))
+                self.conn.execute("DELETE FROM system_metrics_1m WHERE metric_name = ? AND bucket < ?",
+                                  (name, minute_cutoff))
+
+    def close(self):
+        """Flush buffered samples and close the store's connection"""
+        self.flush()
+        with self.lock:
+            self.conn.close()
+
+
+# Test the metrics store
+if __name__ == "__main__":
+    store = MetricsStore(db_path='metrics_demo.db')
+
+    now = time.time()
+    for i in range(7200):
+        store.record('detection_latency_ms', 20 + (i % 50), now - 7200 + i)
+    store.flush()
+
+    for window in (600, 6 * 3600, 7 * 86400):
+        series = store.query('detection_latency_ms', now - window, now)
+        print(f"📈 {window}s window -> {series['resolution']} ({len(series['points'])} points)")
+
+    latencies = [20 + (i % 50) for i in range(7200)]
+    for window in (600, 2 * 3600):
+        summary = store.percentiles('detection_latency_ms', now - window, now)
+        exact = sorted(latencies[-window:])
+        print(f"⏱️ {window}s window ({summary['resolution']}): {summary['percentiles']} "
+              f"vs exact p99 {exact[int(0.99 * (len(exact) - 1))]}")
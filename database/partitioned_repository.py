@@ -0,0 +1,233 @@
+# src/database/partitioned_repository.py
+import logging
+import os
+import re
+from datetime import datetime, timezone
+
+from src.database.columnar_export import PYARROW_AVAILABLE, export_threats, load_threats_table
+from src.database.threat_repository import ThreatRepository, format_timestamp, TIMESTAMP_FORMAT
+
+logger = logging.getLogger(__name__)
+
+PARTITION_FILE_PATTERN = re.compile(r'^threats_(\d{4})_(\d{2})\.db$')
+
+
+def _month_index(key):
+    """Convert a 'YYYY_MM' partition key to a sortable month number"""
+    year, month = key.split('_')
+    return int(year) * 12 + int(month) - 1
+
+
+def _key_from_month_index(index):
+    return f"{index // 12:04d}_{index % 12 + 1:02d}"
+
+
+class PartitionedThreatRepository:
+    """Threat storage split into one SQLite database per month, with retention by whole files"""
+
+    def __init__(self, base_dir='threat_partitions', archive_dir=None, retention_months=None):
+        self.base_dir = base_dir
+        self.archive_dir = archive_dir or os.path.join(base_dir, 'archive')
+        self.retention_months = retention_months
+        self.partitions = {}
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+    def partition_key(self, timestamp=None):
+        """Get the 'YYYY_MM' partition key for a timestamp (UTC now by default)"""
+        formatted = format_timestamp(timestamp) if timestamp is not None else None
+        if formatted is None:
+            formatted = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        return f"{formatted[0:4]}_{formatted[5:7]}"
+
+    def partition_path(self, key):
+        return os.path.join(self.base_dir, f"threats_{key}.db")
+
+    def list_partitions(self):
+        """List partition keys on disk, oldest first"""
+        keys = set(self.partitions)
+        for filename in os.listdir(self.base_dir):
+            match = PARTITION_FILE_PATTERN.match(filename)
+            if match:
+                keys.add(f"{match.group(1)}_{match.group(2)}")
+        return sorted(keys, key=_month_index)
+
+    def get_partition(self, key, create=True):
+        """Get the repository for a partition, opening it on first use"""
+        repo = self.partitions.get(key)
+        if repo is None:
+            path = self.partition_path(key)
+            if not create and not os.path.exists(path):
+                return None
+            repo = ThreatRepository(path)
+            self.partitions[key] = repo
+        return repo
+
+    def log_threat(self, threat_data):
+        """Log a threat to the partition of its timestamp"""
+        if format_timestamp(threat_data.get('timestamp')) is None:
+            # Pin the timestamp so the row and its partition agree
+            threat_data = dict(threat_data, timestamp=datetime.now(timezone.utc))
+        key = self.partition_key(threat_data['timestamp'])
+        self.get_partition(key).log_threat(threat_data)
+
+    def _partitions_between(self, start, end):
+        """Partition keys overlapping [start, end), newest first"""
+        first = _month_index(self.partition_key(start))
+        last = _month_index(self.partition_key(end))
+        return [key for key in reversed(self.list_partitions())
+                if first <= _month_index(key) <= last]
+
+    def get_recent_threats(self, limit=10):
+        """Get recent threats, reading partitions newest first until limit is met"""
+        threats = []
+        for key in reversed(self.list_partitions()):
+            for threat in self.get_partition(key).get_recent_threats(limit - len(threats)):
+                threat['partition'] = key
+                threats.append(threat)
+            if len(threats) >= limit:
+                break
+        return threats
+
+    def get_threats_between(self, start, end, limit=None):
+        """Get threats with start <= timestamp < end across partitions, newest first"""
+        threats = []
+        for key in self._partitions_between(start, end):
+            remaining = None if limit is None else limit - len(threats)
+            for threat in self.get_partition(key).get_threats_between(start, end, remaining):
+                threat['partition'] = key
+                threats.append(threat)
+            if limit is not None and len(threats) >= limit:
+                break
+        return threats
+
+    def search_threats(self, query, filters=None, limit=20):
+        """Full-text search across the partitions that can match the filters' time range"""
+        filters = filters or {}
+        if filters.get('start') is not None or filters.get('end') is not None:
+            keys = self._partitions_between(filters.get('start') or '1970-01-01',
+                                            filters.get('end') or datetime.now(timezone.utc))
+        else:
+            keys = reversed(self.list_partitions())
+
+        results = []
+        for key in keys:
+            for threat in self.get_partition(key).search_threats(query, filters, limit):
+                threat['partition'] = key
+                results.append(threat)
+        results.sort(key=lambda t: t['score'], reverse=True)
+        return results[:limit]
+
+    def get_threat_statistics(self):
+        """Combine per-partition statistics into dashboard totals"""
+        totals = {'total_threats': 0, 'critical_threats': 0, 'resolved_threats': 0, 'avg_confidence': 0.0}
+        confidence_sum = 0.0
+
+        for key in self.list_partitions():
+            stats = self.get_partition(key).get_threat_statistics()
+            total = stats.get('total_threats') or 0
+            totals['total_threats'] += total
+            totals['critical_threats'] += stats.get('critical_threats') or 0
+            totals['resolved_threats'] += stats.get('resolved_threats') or 0
+            confidence_sum += (stats.get('avg_confidence') or 0.0) * total
+
+        if totals['total_threats']:
+            totals['avg_confidence'] = confidence_sum / totals['total_threats']
+        totals['partitions'] = len(self.list_partitions())
+        return totals
+
+    def _close_partition(self, key):
+        repo = self.partitions.pop(key, None)
+        if repo is not None:
+            repo.close()
+
+    def _remove_partition_files(self, key):
+        self._close_partition(key)
+        path = self.partition_path(key)
+        for suffix in ('', '-journal', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    def drop_partition(self, key):
+        """Delete a partition outright"""
+        self._remove_partition_files(key)
+        logger.info("🗑️ Dropped threat partition %s", key)
+
+    def archive_partition(self, key, chunk_size=50000):
+        """Move a partition out of the hot set, compacting it to Parquet when possible"""
+        self._close_partition(key)
+        path = self.partition_path(key)
+        if not os.path.exists(path):
+            return None
+
+        if not PYARROW_AVAILABLE:
+            # Without pyarrow the archive is the SQLite file itself; a rename is O(1)
+            archive_path = os.path.join(self.archive_dir, os.path.basename(path))
+            os.replace(path, archive_path)
+            logger.warning("⚠️ pyarrow not available - archived %s as SQLite: %s", key, archive_path)
+            return archive_path
+
+        archive_path = os.path.join(self.archive_dir, f"threats_{key}.parquet")
+        self._compact_to_parquet(path, archive_path, chunk_size)
+        self._remove_partition_files(key)
+        logger.info("📦 Archived threat partition %s to %s", key, archive_path)
+        return archive_path
+
+    def _compact_to_parquet(self, db_path, archive_path, chunk_size):
+        """Stream a partition's threats into a Parquet file chunk by chunk"""
+        repo = ThreatRepository(db_path)
+        try:
+            export_threats(repo.conn, archive_path, chunk_size=chunk_size, file_format='parquet')
+        finally:
+            repo.close()
+
+    def apply_retention(self, retention_months=None, archive=True, now=None):
+        """Drop or archive partitions older than the retention window"""
+        retention_months = retention_months or self.retention_months
+        if not retention_months:
+            return []
+
+        cutoff = _month_index(self.partition_key(now)) - retention_months + 1
+        expired = [key for key in self.list_partitions() if _month_index(key) < cutoff]
+
+        for key in expired:
+            if archive:
+                self.archive_partition(key)
+            else:
+                self.drop_partition(key)
+
+        if expired:
+            logger.info("✅ Retention applied: %d partition(s) older than %s %s", len(expired),
+                        _key_from_month_index(cutoff), 'archived' if archive else 'dropped')
+        return expired
+
+    def load_archived_partition(self, key):
+        """Load an archived partition back as an Arrow table"""
+        return load_threats_table(os.path.join(self.archive_dir, f"threats_{key}.parquet"))
+
+    def close(self):
+        for key in list(self.partitions):
+            self._close_partition(key)
+
+
+# Test the partitioned repository
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    repo = PartitionedThreatRepository(retention_months=3)
+
+    for month in range(1, 7):
+        repo.log_threat({
+            'type': 'DDoS',
+            'severity': 'HIGH',
+            'timestamp': f'2024-{month:02d}-15 10:30:00',
+            'source_ip': '196.201.0.1',
+            'description': 'Virtual court DDoS',
+            'confidence': 0.9
+        })
+
+    print("🗂️ Partitions:", repo.list_partitions())
+    print("📋 Q2 threats:", len(repo.get_threats_between('2024-04-01', '2024-07-01')))
+    repo.apply_retention(now='2024-06-30 00:00:00')
+    print("🗂️ Partitions after retention:", repo.list_partitions())
+    print("📊 Statistics:", repo.get_threat_statistics())
@@ -0,0 +1,172 @@
+# src/database/quantile_sketch.py
+import math
+import struct
+
+import numpy as np
+
+# relative_accuracy, min_value, zero_count, count, sum, min, max, number of bins
+_HEADER = struct.Struct('<ddqqdddi')
+
+
+class DDSketch:
+    """Relative-error quantile sketch (DDSketch) for non-negative values.
+
+    Values fall into logarithmic bins, so any quantile is returned within
+    `relative_accuracy` of the true value. Sketches built with the same
+    accuracy merge exactly by adding bin counts, which makes them safe to
+    combine across days, scopes or worker processes.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value):
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value, count=1):
+        """Add one value (count times)"""
+        if value < 0:
+            raise ValueError("DDSketch only accepts non-negative values")
+        if value < self.min_value:
+            self.zero_count += count
+        else:
+            index = self._index(value)
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update(self, values):
+        """Add many values at once using NumPy binning"""
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        if values.min() < 0:
+            raise ValueError("DDSketch only accepts non-negative values")
+
+        positive = values[values >= self.min_value]
+        self.zero_count += int(values.size - positive.size)
+        if positive.size:
+            indexes, counts = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(np.int64),
+                                        return_counts=True)
+            for index, count in zip(indexes.tolist(), counts.tolist()):
+                self.bins[index] = self.bins.get(index, 0) + count
+
+        self.count += int(values.size)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        """Fold another sketch with the same accuracy into this one"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0 <= q <= 1); None when the sketch is empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self, qs=(0.5, 0.95, 0.99)):
+        """Get {'p50': ..., 'p95': ...} for the given quantiles"""
+        return {f"p{round(q * 100, 1):g}": self.quantile(q) for q in qs}
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self):
+        """JSON-safe representation (bin indexes become string keys)"""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'min_value': self.min_value,
+            'bins': {str(index): count for index, count in self.bins.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'], data.get('min_value', 1e-9))
+        sketch.bins = {int(index): count for index, count in data['bins'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.sum = data['sum']
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+    def to_bytes(self):
+        """Compact binary form for BLOB storage: a fixed header, then int32 indexes and int64 counts"""
+        indexes = np.fromiter(self.bins.keys(), dtype='<i4', count=len(self.bins))
+        counts = np.fromiter(self.bins.values(), dtype='<i8', count=len(self.bins))
+        header = _HEADER.pack(self.relative_accuracy, self.min_value, self.zero_count, self.count,
+                              self.sum, self.min, self.max, len(self.bins))
+        return header + indexes.tobytes() + counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        accuracy, min_value, zero_count, count, total, minimum, maximum, n_bins = _HEADER.unpack_from(data)
+        sketch = cls(accuracy, min_value)
+        offset = _HEADER.size
+        indexes = np.frombuffer(data, dtype='<i4', count=n_bins, offset=offset)
+        counts = np.frombuffer(data, dtype='<i8', count=n_bins, offset=offset + 4 * n_bins)
+        sketch.bins = dict(zip(indexes.tolist(), counts.tolist()))
+        sketch.zero_count = zero_count
+        sketch.count = count
+        sketch.sum = total
+        sketch.min = minimum
+        sketch.max = maximum
+        return sketch
+
+
+# Test the quantile sketch
+if __name__ == "__main__":
+    values = np.random.default_rng(7).lognormal(mean=3.0, sigma=1.0, size=200000)
+
+    left, right = DDSketch(), DDSketch()
+    left.update(values[:100000])
+    for value in values[100000:101000]:
+        right.add(value)
+    right.update(values[101000:])
+    merged = DDSketch.from_dict(left.to_dict()).merge(DDSketch.from_bytes(right.to_bytes()))
+
+    for q in (0.5, 0.95, 0.99):
+        exact = float(np.quantile(values, q))
+        estimate = merged.quantile(q)
+        print(f"📊 p{q * 100:g}: exact {exact:.3f}, sketch {estimate:.3f} "
+              f"({abs(estimate - exact) / exact * 100:.2f}% error)")
+    print(f"📦 {len(merged.bins)} bins, {len(merged.to_bytes())} bytes for {merged.count:,} values")
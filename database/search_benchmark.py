@@ -0,0 +1,124 @@
+# src/database/search_benchmark.py
+import argparse
+import os
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from src.database.threat_repository import ThreatRepository
+from src.threat_detection.simulators.threat_incidents import ThreatIncidentGenerator
+
+SEVERITY_BY_TYPE = {
+    'ransomware': 'CRITICAL',
+    'data_exfiltration': 'CRITICAL',
+    'ddos': 'HIGH',
+    'insider_threat': 'MEDIUM'
+}
+
+DEFAULT_QUERIES = ['host-4242', 'case-123456', 'cryptolocker', 'DNS Tunneling', 'Stopped backup services', 'encrypted']
+
+
+def describe_incident(incident):
+    """Flatten a simulator payload into the free text stored in threats.description"""
+    parts = [incident['threat_type'].replace('_', ' ')]
+    for value in list(incident['indicators'].values()) + list(incident['metadata'].values()):
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, list):
+            parts.extend(str(item) for item in value[:4])
+    return ' | '.join(parts)
+
+
+def generate_synthetic_threats(n_rows, pool_size=2000, seed=42):
+    """Yield threat dicts built from a pool of simulator incidents"""
+    random.seed(seed)
+    generator = ThreatIncidentGenerator()
+    builders = [generator.generate_ransomware_incident, generator.generate_ddos_incident,
+                generator.generate_data_exfiltration, generator.generate_insider_threat]
+
+    pool = []
+    for i in range(pool_size):
+        incident = builders[i % len(builders)]()
+        pool.append((incident['threat_type'], describe_incident(incident)))
+
+    start = datetime(2024, 1, 1)
+    for i in range(n_rows):
+        threat_type, description = pool[random.randrange(pool_size)]
+        yield {
+            'type': threat_type,
+            'severity': SEVERITY_BY_TYPE[threat_type],
+            'timestamp': start + timedelta(seconds=i * 7),
+            'source_ip': f"10.{i % 256}.{(i // 256) % 256}.{random.randint(1, 254)}",
+            'description': f"{description} | host-{i % 5000} case-{i}",
+            'confidence': round(random.uniform(0.5, 0.99), 2)
+        }
+
+
+def populate(repo, n_rows, batch_size=50000):
+    """Bulk-load synthetic threats into the repository"""
+    rows = generate_synthetic_threats(n_rows)
+    loaded = 0
+    while loaded < n_rows:
+        batch = [next(rows) for _ in range(min(batch_size, n_rows - loaded))]
+        repo.log_threats(batch)
+        loaded += len(batch)
+        print(f"   loaded {loaded:,}/{n_rows:,} rows")
+
+
+def time_query(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_search_benchmark(db_path='search_benchmark.db', n_rows=2_000_000, queries=None, limit=20, repeat=3):
+    """Compare FTS5 search_threats against LIKE '%...%' scans"""
+    queries = queries or DEFAULT_QUERIES
+    fresh = not os.path.exists(db_path)
+    repo = ThreatRepository(db_path)
+
+    if fresh:
+        print(f"🧪 Generating {n_rows:,} synthetic threats from simulator payloads...")
+        populate(repo, n_rows)
+
+    total = repo.conn.execute("SELECT COUNT(*) FROM threats").fetchone()[0]
+    print(f"\n🔎 Search benchmark over {total:,} threats (best of {repeat})")
+    print("   top-k: ranked FTS5 search_threats vs LIKE newest-first with LIMIT")
+    print("   count: every match, FTS5 MATCH vs LIKE full scan")
+    print(f"{'query':<26}{'FTS top-k':>11}{'LIKE top-k':>12}{'FTS count':>11}{'LIKE count':>12}{'matches':>10}")
+
+    results = []
+    for query in queries:
+        terms = ' '.join(f'"{t}"' for t in re.findall(r'\w+', query))
+        fts_time, _ = time_query(lambda: repo.search_threats(query, limit=limit), repeat)
+        like_time, _ = time_query(lambda: repo.conn.execute(
+            "SELECT * FROM threats WHERE description LIKE ? ORDER BY timestamp DESC LIMIT ?",
+            (f"%{query}%", limit)).fetchall(), repeat)
+        fts_count_time, matches = time_query(lambda: repo.conn.execute(
+            "SELECT COUNT(*) FROM threats_fts WHERE threats_fts MATCH ?", (terms,)).fetchone()[0], repeat)
+        like_count_time, _ = time_query(lambda: repo.conn.execute(
+            "SELECT COUNT(*) FROM threats WHERE description LIKE ?", (f"%{query}%",)).fetchone()[0], repeat)
+
+        results.append({'query': query, 'matches': matches,
+                        'fts_topk_ms': fts_time * 1000, 'like_topk_ms': like_time * 1000,
+                        'fts_count_ms': fts_count_time * 1000, 'like_count_ms': like_count_time * 1000})
+        print(f"{query:<26}{fts_time * 1000:>9.2f}ms{like_time * 1000:>10.2f}ms"
+              f"{fts_count_time * 1000:>9.2f}ms{like_count_time * 1000:>10.2f}ms{matches:>10,}")
+
+    repo.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FTS5 vs LIKE threat search benchmark')
+    parser.add_argument('--db', default='search_benchmark.db', help='Benchmark database path')
+    parser.add_argument('--rows', type=int, default=2_000_000, help='Synthetic rows to generate')
+    parser.add_argument('--limit', type=int, default=20, help='Results per query')
+    args = parser.parse_args()
+
+    run_search_benchmark(args.db, args.rows, limit=args.limit)
@@ -1,7 +1,107 @@
+import re
 import sqlite3
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 import os
 
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_timestamp(value):
+    """Normalise a datetime or ISO string to SQLite's CURRENT_TIMESTAMP format (UTC; naive values are taken as UTC)"""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def to_epoch(value):
+    """Convert a datetime, SQLite timestamp string or epoch number to epoch seconds (naive values are UTC)"""
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def epoch_to_timestamp(epoch):
+    """Format epoch seconds in SQLite's CURRENT_TIMESTAMP format (UTC)"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+INSERT_THREAT_SQL = '''
+                    INSERT INTO threats (threat_type, severity, timestamp, source_ip, description, confidence)
+                    VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?)
+                    '''
+
+
+def threat_params(threat_data):
+    """Map a threat dict onto INSERT_THREAT_SQL parameters"""
+    return (
+        threat_data['type'],
+        threat_data['severity'],
+        format_timestamp(threat_data.get('timestamp')),
+        threat_data.get('source_ip', 'Unknown'),
+        threat_data.get('description', ''),
+        threat_data.get('confidence', 0.0)
+    )
+
+
+def row_to_threat(row):
+    """Convert a threats table row into the dict shape used by callers"""
+    return {
+        'id': row[0],
+        'type': row[1],
+        'severity': row[2],
+        'timestamp': row[3],
+        'source_ip': row[4],
+        'description': row[5],
+        'resolved': bool(row[6]),
+        'confidence': row[7]
+    }
+
+
+def threat_filter_clauses(filters):
+    """Translate threat filters into SQL clauses on the threats table.
+
+    Supported keys: severity, type, source_ip, source_prefix (e.g. a
+    court's network), resolved, min_confidence, start and end.
+    """
+    columns = {'severity': 'severity', 'type': 'threat_type', 'source_ip': 'source_ip'}
+    where, params = [], []
+
+    for key, column in columns.items():
+        if filters.get(key) is not None:
+            where.append(f"threats.{column} = ?")
+            params.append(filters[key])
+    if filters.get('source_prefix') is not None:
+        where.append("threats.source_ip LIKE ?")
+        params.append(filters['source_prefix'] + '%')
+    if filters.get('resolved') is not None:
+        where.append("threats.resolved = ?")
+        params.append(1 if filters['resolved'] else 0)
+    if filters.get('min_confidence') is not None:
+        where.append("threats.confidence >= ?")
+        params.append(filters['min_confidence'])
+    if filters.get('start') is not None:
+        where.append("threats.timestamp >= ?")
+        params.append(format_timestamp(filters['start']))
+    if filters.get('end') is not None:
+        where.append("threats.timestamp < ?")
+        params.append(format_timestamp(filters['end']))
+
+    return where, params
+
 
 class ThreatRepository:
     def __init__(self, db_path='threat_intelligence.db'):
@@ -69,26 +169,125 @@ class ThreatRepository:
                           )
                           ''')
 
+        # Time-range queries (reports, partition routing) filter on timestamp
+        self.conn.execute('''
+                          CREATE INDEX IF NOT EXISTS idx_threats_timestamp
+                              ON threats (timestamp)
+                          ''')
+
         self.conn.commit()
+        self.create_day_versions()
+        self.fts_enabled = self.create_search_index()
+
+    def create_day_versions(self):
+        """Track a per-day data version (inserts, mutations) so cached reports know when they are stale"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'threat_day_versions'"
+        ).fetchone()
+
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS threat_day_versions (
+                day TEXT PRIMARY KEY,
+                inserts INTEGER NOT NULL DEFAULT 0,
+                mutations INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID;
+
+            CREATE TRIGGER IF NOT EXISTS threat_day_versions_insert AFTER INSERT ON threats BEGIN
+                INSERT INTO threat_day_versions (day, inserts) VALUES (substr(new.timestamp, 1, 10), 1)
+                ON CONFLICT (day) DO UPDATE SET inserts = inserts + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS threat_day_versions_update AFTER UPDATE ON threats BEGIN
+                INSERT INTO threat_day_versions (day, mutations) VALUES (substr(old.timestamp, 1, 10), 1)
+                ON CONFLICT (day) DO UPDATE SET mutations = mutations + 1;
+                INSERT INTO threat_day_versions (day, mutations) VALUES (substr(new.timestamp, 1, 10), 1)
+                ON CONFLICT (day) DO UPDATE SET mutations = mutations + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS threat_day_versions_delete AFTER DELETE ON threats BEGIN
+                INSERT INTO threat_day_versions (day, mutations) VALUES (substr(old.timestamp, 1, 10), 1)
+                ON CONFLICT (day) DO UPDATE SET mutations = mutations + 1;
+            END;
+        ''')
+
+        if not exists:
+            # Seed versions for rows written before the table existed
+            self.conn.execute('''
+                INSERT INTO threat_day_versions (day, inserts)
+                SELECT substr(timestamp, 1, 10), COUNT(*) FROM threats GROUP BY 1
+                ON CONFLICT (day) DO UPDATE SET inserts = excluded.inserts
+            ''')
+            self.conn.commit()
+
+    def get_day_versions(self, start_day, end_day):
+        """Get {day: (inserts, mutations)} for days in [start_day, end_day]"""
+        cursor = self.conn.execute(
+            "SELECT day, inserts, mutations FROM threat_day_versions WHERE day BETWEEN ? AND ?",
+            (start_day, end_day)
+        )
+        return {day: (inserts, mutations) for day, inserts, mutations in cursor}
+
+    def create_search_index(self):
+        """Create the FTS5 index over threat descriptions, kept in sync by triggers"""
+        try:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'threats_fts'"
+            ).fetchone()
+
+            self.conn.executescript('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS threats_fts USING fts5(
+                    description,
+                    threat_type,
+                    content='threats',
+                    content_rowid='id'
+                );
+
+                CREATE TRIGGER IF NOT EXISTS threats_fts_insert AFTER INSERT ON threats BEGIN
+                    INSERT INTO threats_fts (rowid, description, threat_type)
+                    VALUES (new.id, new.description, new.threat_type);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS threats_fts_delete AFTER DELETE ON threats BEGIN
+                    INSERT INTO threats_fts (threats_fts, rowid, description, threat_type)
+                    VALUES ('delete', old.id, old.description, old.threat_type);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS threats_fts_update AFTER UPDATE OF description, threat_type ON threats BEGIN
+                    INSERT INTO threats_fts (threats_fts, rowid, description, threat_type)
+                    VALUES ('delete', old.id, old.description, old.threat_type);
+                    INSERT INTO threats_fts (rowid, description, threat_type)
+                    VALUES (new.id, new.description, new.threat_type);
+                END;
+            ''')
+
+            if not exists:
+                # Index rows written before the FTS table existed
+                self.conn.execute("INSERT INTO threats_fts (threats_fts) VALUES ('rebuild')")
+                self.conn.commit()
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Full-text search unavailable, falling back to LIKE scans: {e}")
+            return False
 
     def log_threat(self, threat_data):
         """Log detected threat to database"""
         try:
-            self.conn.execute('''
-                              INSERT INTO threats (threat_type, severity, source_ip, description, confidence)
-                              VALUES (?, ?, ?, ?, ?)
-                              ''', (
-                                  threat_data['type'],
-                                  threat_data['severity'],
-                                  threat_data.get('source_ip', 'Unknown'),
-                                  threat_data.get('description', ''),
-                                  threat_data.get('confidence', 0.0)
-                              ))
+            self.conn.execute(INSERT_THREAT_SQL, threat_params(threat_data))
             self.conn.commit()
             print("✅ Threat logged to database")
         except Exception as e:
             print(f"❌ Failed to log threat: {e}")
 
+    def log_threats(self, threats):
+        """Log a batch of threats in a single transaction"""
+        try:
+            with self.conn:
+                cursor = self.conn.executemany(INSERT_THREAT_SQL, (threat_params(t) for t in threats))
+            return cursor.rowcount
+        except Exception as e:
+            print(f"❌ Failed to log threat batch: {e}")
+            return 0
+
     def get_recent_threats(self, limit=10):
         """Get recent threats from database"""
         try:
@@ -99,23 +298,90 @@ class ThreatRepository:
                                            LIMIT ?
                                        ''', (limit,))
 
-            threats = []
-            for row in cursor.fetchall():
-                threats.append({
-                    'id': row[0],
-                    'type': row[1],
-                    'severity': row[2],
-                    'timestamp': row[3],
-                    'source_ip': row[4],
-                    'description': row[5],
-                    'resolved': bool(row[6]),
-                    'confidence': row[7]
-                })
-            return threats
+            return [row_to_threat(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"❌ Failed to get recent threats: {e}")
             return []
 
+    def get_threats_between(self, start, end, limit=None):
+        """Get threats with start <= timestamp < end, newest first"""
+        try:
+            query = '''
+                    SELECT *
+                    FROM threats
+                    WHERE timestamp >= ? AND timestamp < ?
+                    ORDER BY timestamp DESC
+                    '''
+            params = [format_timestamp(start), format_timestamp(end)]
+            if limit is not None:
+                query += ' LIMIT ?'
+                params.append(limit)
+
+            cursor = self.conn.execute(query, params)
+            return [row_to_threat(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Failed to get threats between {start} and {end}: {e}")
+            return []
+
+    def get_threats_page(self, after_id=0, limit=500, start=None, end=None):
+        """Get the next page of threats by id (keyset pagination), optionally within a time range"""
+        where, params = self._search_filters({'start': start, 'end': end})
+        cursor = self.conn.execute(f'''
+            SELECT *
+            FROM threats
+            WHERE {' AND '.join(['threats.id > ?'] + where)}
+            ORDER BY id
+            LIMIT ?
+            ''', [after_id] + params + [limit])
+        return [row_to_threat(row) for row in cursor.fetchall()]
+
+    def search_threats(self, query, filters=None, limit=20):
+        """Full-text search over threat descriptions, best matches first.
+
+        filters may contain any key accepted by threat_filter_clauses. Each result carries a 'score' where higher is better.
+        """
+        terms = re.findall(r'\w+\*?', query or '')
+        if not terms:
+            return []
+
+        where, params = self._search_filters(filters or {})
+        try:
+            if self.fts_enabled:
+                # Quote each term so punctuation in IOCs never reaches the FTS5 parser
+                match = ' '.join(f'"{t[:-1]}"*' if t.endswith('*') else f'"{t}"' for t in terms)
+                cursor = self.conn.execute(f'''
+                    SELECT threats.*, -bm25(threats_fts) AS score
+                    FROM threats_fts
+                    JOIN threats ON threats.id = threats_fts.rowid
+                    WHERE threats_fts MATCH ? {''.join(' AND ' + clause for clause in where)}
+                    ORDER BY bm25(threats_fts)
+                    LIMIT ?
+                    ''', [match] + params + [limit])
+            else:
+                like_clauses = ['description LIKE ?'] * len(terms)
+                like_params = [f"%{t.rstrip('*')}%" for t in terms]
+                cursor = self.conn.execute(f'''
+                    SELECT threats.*, 0.0 AS score
+                    FROM threats
+                    WHERE {' AND '.join(like_clauses + where)}
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                    ''', like_params + params + [limit])
+
+            results = []
+            for row in cursor.fetchall():
+                threat = row_to_threat(row)
+                threat['score'] = row[8]
+                results.append(threat)
+            return results
+        except Exception as e:
+            print(f"❌ Threat search failed: {e}")
+            return []
+
+    def _search_filters(self, filters):
+        """Translate search filters into SQL clauses on the threats table"""
+        return threat_filter_clauses(filters)
+
     def get_threat_statistics(self):
         """Get threat statistics for dashboard"""
         try:
@@ -138,6 +404,22 @@ class ThreatRepository:
             print(f"❌ Failed to get threat statistics: {e}")
             return {}
 
+    def export_columnar(self, path, start=None, end=None, chunk_size=50000, file_format=None):
+        """Stream threats in [start, end) to Parquet or Arrow IPC (chosen by extension)"""
+        from src.database.columnar_export import export_threats
+
+        try:
+            rows = export_threats(self.conn, path, start, end, chunk_size, file_format)
+            print(f"✅ Exported {rows} threats to {path}")
+            return rows
+        except Exception as e:
+            print(f"❌ Columnar export failed: {e}")
+            return 0
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
 
 # Test the database
 if __name__ == "__main__":
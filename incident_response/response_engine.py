@@ -1,32 +1,70 @@
 # src/incident_response/response_engine.py
-from datetime import datetime
+from src.database.incident_store import IncidentStore
+from src.incident_response.incident_correlator import IncidentCorrelator
 
 
 class IncidentResponseEngine:
-    def __init__(self, config):
+    def __init__(self, config, correlator=None, store=None):
         self.config = config
-        self.incident_log = []
+        # Related threats inside the window join one open incident instead of opening their own
+        self.correlator = correlator or IncidentCorrelator(
+            window=getattr(config, 'INCIDENT_CORRELATION_WINDOW', 300.0))
+        # Incidents are indexed by id, status and time, and persisted next to the threats table
+        self.store = store or IncidentStore(db_path=getattr(config, 'DATABASE_PATH', 'threat_intelligence.db'))
+        self._restore_incidents()
 
-    def execute_response(self, threat_data):
-        if threat_data['threat_detected']:
-            incident_id = f"INC-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    def _restore_incidents(self):
+        """Reload unresolved incidents so threats after a restart still join them"""
+        self.store.load()
+        incidents = self.store.with_status('open') + self.store.with_status('contained')
+        for incident in sorted(incidents, key=lambda i: i.get('updated_at', i['opened_at'])):
+            if incident['incident_id'] not in self.correlator.open_incidents:
+                # The alert for a severe incident went out before the restart
+                incident.setdefault('alerted', (incident.get('max_severity_score') or 0.0) > 0.7)
+                self.correlator.restore(incident)
 
-            incident_record = {
-                'incident_id': incident_id,
-                'timestamp': datetime.now().isoformat(),
-                'threat_data': threat_data,
-                'status': 'open'
-            }
+    @property
+    def incident_log(self):
+        """Incidents held in memory, oldest first"""
+        return list(self.store.by_id.values())
 
-            self.incident_log.append(incident_record)
+    def execute_response(self, threat_data):
+        if threat_data['threat_detected']:
+            incident, created = self.correlator.correlate(threat_data)
+            if created:
+                self.store.add(incident)
+            else:
+                self.store.touch(incident)
+            incident_id = incident['incident_id']
 
             response_actions = []
-            if threat_data['severity_score'] > 0.7:
+            # One alert per incident: when it opens severe, or when a correlated event escalates it
+            if threat_data['severity_score'] > 0.7 and not incident.get('alerted'):
+                incident['alerted'] = True
                 response_actions.append(self._alert_security_team(threat_data, incident_id))
 
             return response_actions
         return []
 
+    def contain_incident(self, incident_id):
+        """Mark an incident contained; correlated events keep attaching to it"""
+        return self.store.transition(incident_id, 'contained')
+
+    def resolve_incident(self, incident_id):
+        """Mark an incident resolved; later related threats open a new incident"""
+        self.correlator.close(incident_id)
+        return self.store.transition(incident_id, 'resolved')
+
+    def get_open_incidents(self, minutes=None):
+        """Open incidents, optionally only those opened in the last N minutes"""
+        if minutes is None:
+            return self.store.with_status('open')
+        return self.store.recent(minutes, status='open')
+
+    def close(self):
+        """Write pending incidents to SQLite and close the store"""
+        self.store.close()
+
     def _alert_security_team(self, threat_data, incident_id):
         print(f"🚨 SECURITY ALERT {incident_id}")
-        return {'action': 'alert_sent', 'incident_id': incident_id}
\ No newline at end of file
+        return {'action': 'alert_sent', 'incident_id': incident_id}
@@ -10,7 +10,7 @@ from collections import defaultdict, deque
 
 
 class ReflectiveCoAdaptiveModel:
-    def __init__(self):
+    def __init__(self, traffic_analyzer=None):
         self.model_version = "2.0.0"
         self.learning_rate = 0.01
         self.adaptation_threshold = 0.15
@@ -37,6 +37,9 @@ class ReflectiveCoAdaptiveModel:
         self.adaptation_cooldown = timedelta(minutes=5)
         self.last_adaptation = datetime.now()
 
+        # Optional TrafficAnalyzer: windowed source cardinality when threat data carries no source_count
+        self.traffic_analyzer = traffic_analyzer
+
         print("🔄 Reflective Co-Adaptive AI Model Initialized")
 
     def analyze_and_reflect(self, threat_data: Dict, detection_result: Dict) -> Dict:
@@ -440,11 +443,33 @@ class ReflectiveCoAdaptiveModel:
             anomalies.append('unusual_critical_activity_time')
 
         # Check for coordination patterns
-        if threat_data.get('source_count', 1) > 5:
+        if self._source_count(threat_data) > 5:
             anomalies.append('multiple_source_coordination')
 
+        # Sketch features: one source or one endpoint carrying most of the window's traffic
+        traffic = threat_data.get('traffic_features') or {}
+        if traffic.get('top_source_share', 0) > 0.5:
+            anomalies.append('single_source_flood')
+        if traffic.get('top_endpoint_share', 0) > 0.8 and traffic.get('unique_sources', 0) > 5:
+            anomalies.append('endpoint_concentration')
+
         return anomalies
 
+    def _source_count(self, threat_data: Dict) -> int:
+        """Distinct sources behind a threat: explicit count, indicator IPs, then the DDoS traffic window"""
+        if 'source_count' in threat_data:
+            return threat_data['source_count']
+        indicators = threat_data.get('indicators')
+        if isinstance(indicators, dict) and indicators.get('source_ips'):
+            return len(set(indicators['source_ips']))
+        # Window cardinality describes volumetric traffic, not e.g. one phishing email
+        if threat_data.get('threat_type') == 'ddos':
+            if 'window_unique_sources' in threat_data:
+                return threat_data['window_unique_sources']
+            if self.traffic_analyzer is not None:
+                return max(1, self.traffic_analyzer.unique_sources())
+        return 1
+
     def _calculate_evolution_metrics(self, pattern_history: List) -> Dict:
         """Calculate evolution metrics for threat patterns"""
         if len(pattern_history) < 2:
@@ -1,25 +1,79 @@
 # Create src/ml/threat_classifier.py
+import re
+
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import joblib
+import os
+
+from src.database.columnar_export import load_threats_table, table_to_matrix
+from src.threat_detection.indicator_scanner import IndicatorScanner
+
+CLASSIFIER_FEATURES = ['request_rate', 'source_ip_count', 'suspicious_keywords', 'url_length']
+
+_URL = re.compile(r'(?:https?://|www\.)\S+', re.IGNORECASE)
+
+
+def features_from_export(table, label_threshold=0.5, scanner=None):
+    """Derive the classifier's columns from a threats export (columnar_export.THREAT_SCHEMA).
+
+    request_rate is the number of threats from the row's source IP in the
+    same minute, source_ip_count the distinct source IPs reporting the same
+    threat type in that minute, suspicious_keywords the indicator matches
+    in the description and url_length its longest URL. The threats table
+    holds no analyst verdict, so is_threat is confidence >= label_threshold.
+    """
+    frame = table.select(['threat_type', 'timestamp', 'source_ip', 'description', 'confidence']).to_pandas()
+    minute = frame['timestamp'].fillna('').str[:16]
+    source_ip = frame['source_ip'].fillna('Unknown')
+
+    features = pd.DataFrame(index=frame.index)
+    features['request_rate'] = source_ip.groupby([source_ip, minute]).transform('size')
+    features['source_ip_count'] = source_ip.groupby([frame['threat_type'], minute]).transform('nunique')
+
+    # Descriptions repeat heavily; scan each distinct text once
+    codes, descriptions = pd.factorize(frame['description'].fillna(''))
+    scanner = scanner or IndicatorScanner()
+    keywords = [len(result['matches']) for result in scanner.scan_many(descriptions)]
+    url_lengths = [max((len(url) for url in _URL.findall(text)), default=0) for text in descriptions]
+    features['suspicious_keywords'] = pd.Series(keywords, dtype='int64').to_numpy()[codes]
+    features['url_length'] = pd.Series(url_lengths, dtype='int64').to_numpy()[codes]
+
+    features['is_threat'] = (frame['confidence'].fillna(0.0) >= label_threshold).astype(int)
+    return features
 
 
 class MLThreatClassifier:
     def __init__(self):
         self.model = RandomForestClassifier(n_estimators=100)
-        self.features = ['request_rate', 'source_ip_count', 'suspicious_keywords', 'url_length']
+        self.features = list(CLASSIFIER_FEATURES)
+
+    def train_on_historical_data(self, historical_data, model_path='models/threat_classifier.pkl'):
+        """Train ML model on historical threat data (DataFrame, Arrow table or Parquet/Arrow path).
+
+        Tables and files in the threats export schema are mapped to the
+        classifier's features with features_from_export().
+        """
+        if isinstance(historical_data, (str, os.PathLike)):
+            historical_data = load_threats_table(historical_data)
+        if not isinstance(historical_data, pd.DataFrame) and 'is_threat' not in historical_data.column_names:
+            historical_data = features_from_export(historical_data)
 
-    def train_on_historical_data(self, historical_data):
-        """Train ML model on historical threat data"""
-        X = historical_data[self.features]
-        y = historical_data['is_threat']
+        if isinstance(historical_data, pd.DataFrame):
+            X = historical_data[self.features]
+            y = historical_data['is_threat']
+        else:
+            # Arrow table: pull numeric columns straight into NumPy
+            X = table_to_matrix(historical_data, self.features)
+            y = historical_data.column('is_threat').to_numpy(zero_copy_only=False)
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
         self.model.fit(X_train, y_train)
 
         # Save model
-        joblib.dump(self.model, 'models/threat_classifier.pkl')
+        os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+        joblib.dump(self.model, model_path)
 
     def predict_threat(self, features):
         """Predict if features indicate a threat"""
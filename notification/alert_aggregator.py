@@ -0,0 +1,240 @@
+# src/notification/alert_aggregator.py
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+
+# Channel rate limits as (alerts per second, burst); None means unlimited
+DEFAULT_CHANNEL_LIMITS = {
+    'sms': (0.2, 5),
+    'email': (1.0, 20),
+    'dashboard_alert': (10.0, 100),
+    'incident_response': None,
+    'log_only': None
+}
+
+
+def source_subnet(source_ip, ipv4_prefix=24, ipv6_prefix=64):
+    """Collapse a source address to its subnet so one botnet range maps to one alert key"""
+    try:
+        address = ipaddress.ip_address(str(source_ip).strip())
+    except ValueError:
+        return 'unknown'
+    prefix = ipv4_prefix if address.version == 4 else ipv6_prefix
+    # Mask the integer form; building an ip_network per alert is several times slower
+    mask = ((1 << prefix) - 1) << (address.max_prefixlen - prefix)
+    return f"{ipaddress.ip_address(int(address) & mask)}/{prefix}"
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def allow(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AlertAggregator:
+    """Deduplicate, rate-limit and summarise alerts before they reach the channels.
+
+    Alerts are keyed on (type, severity, source subnet). After a key has
+    been forwarded, repeats inside `window` seconds are counted rather than
+    sent, and the counts go out as periodic digest alerts. An alert that
+    was forwarded on some channels but rate-limited on others is counted
+    for the digest too, with the channels it missed. Active keys live
+    in an LRU capped at `max_keys`; evicted keys fold their counts into a
+    per-(type, severity) overflow tally so memory stays bounded.
+    """
+
+    def __init__(self, window=60.0, max_keys=10000, channel_limits=None, digest_interval=60.0,
+                 ipv4_prefix=24, clock=time.monotonic):
+        self.window = window
+        self.max_keys = max_keys
+        self.digest_interval = digest_interval
+        self.ipv4_prefix = ipv4_prefix
+        self.clock = clock
+        self.channel_limits = DEFAULT_CHANNEL_LIMITS if channel_limits is None else channel_limits
+
+        self.lock = threading.Lock()
+        self.keys = OrderedDict()
+        self.overflow = {}
+        self.buckets = {}
+        self.last_digest = clock()
+        self.stats = {'received': 0, 'forwarded': 0, 'suppressed': 0, 'rate_limited': 0, 'evicted': 0, 'digests': 0}
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def key_for(self, threat_data):
+        return (threat_data.get('type', 'Unknown'),
+                str(threat_data.get('severity', 'LOW')).upper(),
+                source_subnet(threat_data.get('source_ip'), self.ipv4_prefix))
+
+    def _allow(self, channel, now):
+        limit = self.channel_limits.get(channel)
+        if limit is None:
+            return True
+        bucket = self.buckets.get(channel)
+        if bucket is None:
+            bucket = self.buckets[channel] = TokenBucket(limit[0], limit[1], now)
+        return bucket.allow(now)
+
+    def _evict(self, now):
+        """Drop idle keys from the LRU head, then the oldest keys beyond max_keys"""
+        while self.keys:
+            key, entry = next(iter(self.keys.items()))
+            idle = now - entry['last_seen'] >= self.window and not entry['suppressed']
+            if not idle and len(self.keys) <= self.max_keys:
+                break
+            self.keys.popitem(last=False)
+            if entry['suppressed']:
+                tally_key = key[:2]
+                self.overflow[tally_key] = self.overflow.get(tally_key, 0) + entry['suppressed']
+                self.stats['evicted'] += 1
+
+    def process(self, threat_data, channels, now=None):
+        """Return the channels this alert should go to now; [] means it was folded into a digest"""
+        now = self.clock() if now is None else now
+        key = self.key_for(threat_data)
+
+        with self.lock:
+            self.stats['received'] += 1
+            entry = self.keys.get(key)
+            if entry is None:
+                entry = self.keys[key] = {'first_seen': now, 'last_seen': now, 'last_sent': None, 'suppressed': 0,
+                                          'rate_limited': {}}
+            else:
+                self.keys.move_to_end(key)
+            entry['last_seen'] = now
+
+            limited = []
+            if entry['last_sent'] is not None and now - entry['last_sent'] < self.window:
+                allowed = []
+            else:
+                allowed = []
+                for channel in channels:
+                    (allowed if self._allow(channel, now) else limited).append(channel)
+                if limited:
+                    self.stats['rate_limited'] += 1
+                    for channel in limited:
+                        entry['rate_limited'][channel] = entry['rate_limited'].get(channel, 0) + 1
+
+            if allowed:
+                entry['last_sent'] = now
+                self.stats['forwarded'] += 1
+                if limited:
+                    # The limited channels missed this alert; the digest reports it to them
+                    entry['suppressed'] += 1
+            else:
+                # Duplicate inside the window, or every channel is out of tokens
+                entry['suppressed'] += 1
+                self.stats['suppressed'] += 1
+            self._evict(now)
+            return allowed
+
+    def due_digests(self, now=None, force=False):
+        """Digest alerts for suppressed counts, at most once per digest_interval"""
+        now = self.clock() if now is None else now
+        with self.lock:
+            if not force and now - self.last_digest < self.digest_interval:
+                return []
+            period = now - self.last_digest
+            self.last_digest = now
+
+            # One digest per (type, severity): a DDoS across hundreds of subnets is one summary
+            groups = {}
+            for (threat_type, severity, subnet), entry in self.keys.items():
+                if entry['suppressed']:
+                    group = groups.setdefault((threat_type, severity), {'count': 0, 'subnets': [], 'rate_limited': {}})
+                    group['count'] += entry['suppressed']
+                    group['subnets'].append((entry['suppressed'], subnet))
+                    for channel, count in entry['rate_limited'].items():
+                        group['rate_limited'][channel] = group['rate_limited'].get(channel, 0) + count
+                    entry['suppressed'] = 0
+                    entry['rate_limited'] = {}
+            for tally_key, count in self.overflow.items():
+                group = groups.setdefault(tally_key, {'count': 0, 'subnets': [], 'rate_limited': {}})
+                group['count'] += count
+                group['subnets'].append((count, 'evicted sources'))
+
+            digests = []
+            for (threat_type, severity), group in groups.items():
+                top = sorted(group['subnets'], reverse=True)[:5]
+                digests.append({
+                    'type': threat_type,
+                    'severity': severity,
+                    'source_ip': top[0][1] if len(group['subnets']) == 1 else 'multiple',
+                    'digest': True,
+                    'suppressed_count': group['count'],
+                    'subnet_count': len(group['subnets']),
+                    'top_subnets': {subnet: count for count, subnet in top},
+                    'rate_limited_channels': group['rate_limited'],
+                    'description': f"{group['count']} similar {threat_type} alerts from {len(group['subnets'])} "
+                                   f"source subnet(s) suppressed in the last {period:.0f}s; top: "
+                                   + ', '.join(f"{subnet} ({count})" for count, subnet in top)
+                                   + ("; rate-limited on: " + ', '.join(f"{channel} ({count})" for channel, count
+                                                                          in group['rate_limited'].items())
+                                      if group['rate_limited'] else '')
+                })
+            self.overflow = {}
+            self.stats['digests'] += len(digests)
+            return digests
+
+    def start(self, emit):
+        """Emit due digests from a background thread, so quiet periods still flush them"""
+        def run():
+            while not self._stop.wait(self.digest_interval):
+                for digest in self.due_digests():
+                    emit(digest)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='alert-digests', daemon=True)
+        self._thread.start()
+
+    def stop(self, emit=None):
+        """Stop the digest thread, emitting whatever is still pending"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if emit:
+            for digest in self.due_digests(force=True):
+                emit(digest)
+
+
+# Test the alert aggregator
+if __name__ == "__main__":
+    import random
+
+    aggregator = AlertAggregator(window=60.0, max_keys=5000, digest_interval=60.0, clock=lambda: 0.0)
+    botnets = ['196.201', '41.139', '185.130']
+    forwarded = {'sms': 0, 'email': 0, 'dashboard_alert': 0}
+    digests = []
+
+    # Five simulated minutes of a virtual-court DDoS: 100k events from three botnet ranges
+    n_events = 100000
+    started = time.perf_counter()
+    for i in range(n_events):
+        now = i * 300.0 / n_events
+        threat = {'type': 'DDoS', 'severity': random.choice(['HIGH', 'CRITICAL']),
+                  'source_ip': f"{random.choice(botnets)}.{random.randrange(256)}.{random.randrange(1, 255)}"}
+        for channel in aggregator.process(threat, ['sms', 'email', 'dashboard_alert'], now):
+            forwarded[channel] += 1
+        digests.extend(aggregator.due_digests(now))
+    elapsed = time.perf_counter() - started
+
+    print(f"🌊 {n_events:,} events in {elapsed:.2f}s ({elapsed / n_events * 1e6:.1f}µs each), "
+          f"{len(aggregator.keys)} active keys")
+    print(f"📤 Forwarded: {forwarded}, digests: {len(digests)}")
+    print(f"📊 Stats: {aggregator.stats}")
+    print(f"📝 Sample digest: {digests[0]['description'] if digests else None}")
@@ -1,25 +1,49 @@
-import smtplib
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
 import logging
 
+from src.notification.alert_aggregator import AlertAggregator
+from src.notification.alert_dispatcher import AlertDispatcher, DEFAULT_CHANNEL_POLICIES
+from src.notification.alert_logging import get_alert_log_pipeline
+from src.notification.smtp_pool import DigestBatcher, build_message
+
 
 class AlertSystem:
-    def __init__(self):
+    def __init__(self, compliance_evaluator=None, channel_policies=None, aggregator=None, smtp_pool=None,
+                 email_sender='threat-alerts@judiciary.go.ke', email_recipients=('security-team@judiciary.go.ke',),
+                 digest_severities=('MEDIUM', 'LOW'), email_digest_interval=300.0):
         self.alert_rules = self.load_alert_rules()
+        self.compliance_evaluator = compliance_evaluator
         self.setup_logging()
 
-    def setup_logging(self):
-        """Setup logging for alert system"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('alerts.log'),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+        # Without a pool, email alerts are only logged
+        self.smtp_pool = smtp_pool
+        self.email_sender = email_sender
+        self.email_recipients = list(email_recipients)
+        self.digest_severities = set(digest_severities)
+        self.email_digests = None
+        if smtp_pool:
+            # Low-severity alerts and aggregator digests are batched into one email per interval
+            self.email_digests = DigestBatcher(smtp_pool, email_sender, self.email_recipients,
+                                               interval=email_digest_interval)
+            self.email_digests.start()
+
+        # Channels run on their own workers so send_alert never waits on delivery
+        self.dispatcher = AlertDispatcher({
+            'email': self.send_email_alert,
+            'sms': self.send_sms_alert,
+            'incident_response': self.trigger_incident_response,
+            'dashboard_alert': self.create_dashboard_alert,
+            'log_only': self.log_threat
+        }, channel_policies or DEFAULT_CHANNEL_POLICIES)
+
+        # Repeats of an active alert are deduplicated, rate-limited and sent as digests
+        self.aggregator = aggregator or AlertAggregator()
+        self.aggregator.start(self.send_digest)
+
+    def setup_logging(self, log_file='alerts.log', **options):
+        """Setup non-blocking JSON-lines logging for the notification package"""
+        # Dispatcher and SMTP errors log under the same package logger, so they share the pipeline
+        self.log_pipeline = get_alert_log_pipeline('src.notification', log_file=log_file, **options)
+        self.logger = logging.getLogger('src.notification.alert_system')
 
     def load_alert_rules(self):
         """Load alert rules configuration"""
@@ -31,31 +55,67 @@ class AlertSystem:
         }
 
     def send_alert(self, threat_data):
-        """Send alerts based on threat severity"""
+        """Queue alerts based on threat severity; returns {channel: accepted}"""
         severity = threat_data.get('severity', 'LOW').upper()
         alert_methods = self.alert_rules.get(severity, ['log_only'])
 
-        self.logger.info(f"🚨 Alert triggered: {threat_data['type']} - Severity: {severity}")
-
-        for method in alert_methods:
-            try:
-                if method == 'email':
-                    self.send_email_alert(threat_data)
-                elif method == 'sms':
-                    self.send_sms_alert(threat_data)
-                elif method == 'incident_response':
-                    self.trigger_incident_response(threat_data)
-                elif method == 'dashboard_alert':
-                    self.create_dashboard_alert(threat_data)
-                elif method == 'log_only':
-                    self.log_threat(threat_data)
-            except Exception as e:
-                self.logger.error(f"Failed to send {method} alert: {e}")
+        self.logger.info("🚨 Alert triggered: %s - Severity: %s", threat_data['type'], severity)
+
+        channels = self.aggregator.process(threat_data, alert_methods)
+        if not channels:
+            return {}
+        # Only forwarded alerts can open a breach; repeats share it through the dedup key
+        if self.compliance_evaluator:
+            self.track_breach_deadline(threat_data)
+        return self.dispatcher.dispatch(channels, threat_data)
+
+    def send_digest(self, digest):
+        """Send a digest of suppressed alerts on its severity's channels, bypassing the aggregator"""
+        self.logger.info("🧾 Alert digest: %s", digest['description'], extra={'digest': digest})
+        return self.dispatcher.dispatch(self.alert_rules.get(digest['severity'], ['log_only']), digest)
+
+    def get_dispatch_metrics(self):
+        """Per-channel delivery counts, backlog and latency percentiles"""
+        return self.dispatcher.metrics()
+
+    def flush_alerts(self, timeout=None):
+        """Wait for queued alerts to be delivered"""
+        return self.dispatcher.flush(timeout)
+
+    def shutdown(self):
+        """Flush pending digests, deliver outstanding alerts and stop the channel workers"""
+        self.aggregator.stop(emit=self.send_digest)
+        self.dispatcher.shutdown()
+        if self.email_digests:
+            self.email_digests.stop()
+        if self.smtp_pool:
+            self.smtp_pool.close()
+
+    def track_breach_deadline(self, threat_data):
+        """Start the GDPR notification clock when an alert is a new personal-data breach"""
+        breach_key = 'BREACH-' + ':'.join(self.aggregator.key_for(threat_data))
+        breach_id = self.compliance_evaluator.record_threat(threat_data, breach_key)
+        breach = self.compliance_evaluator.get_breach(breach_id) if breach_id else None
+        if breach:
+            self.logger.warning("⚖️ GDPR breach %s opened - notify the supervisory authority by %s",
+                                breach_id, breach['deadline'].strftime('%Y-%m-%d %H:%M UTC'))
+        return breach_id
+
+    def get_compliance_posture(self):
+        """Current compliance posture, if an evaluator is attached"""
+        return self.compliance_evaluator.posture() if self.compliance_evaluator else None
 
     def send_email_alert(self, threat_data):
         """Send email alert to security team"""
-        # This is a simulation - implement with real email service
         subject = f"🚨 THREAT ALERT: {threat_data['type']}"
+        if not self.smtp_pool:
+            self.logger.info("📧 Email alert prepared: %s", subject)
+            return
+
+        if threat_data.get('digest') or str(threat_data.get('severity', 'LOW')).upper() in self.digest_severities:
+            self.email_digests.add(threat_data)
+            return
+
         body = f"""
         Threat Detection System Alert:
 
@@ -67,34 +127,37 @@ class AlertSystem:
 
         Recommended Action: {threat_data.get('recommended_action', 'Investigate immediately')}
         """
-
-        self.logger.info(f"📧 Email alert prepared: {subject}")
-        # Implementation for real email would go here
-        # smtplib.SMTP() etc.
+        # Raising lets the email channel retry with backoff
+        if not self.smtp_pool.send_message(build_message(self.email_sender, self.email_recipients, subject, body)):
+            raise ConnectionError(f"SMTP delivery failed for {subject}")
+        self.logger.info("📧 Email alert sent: %s", subject)
 
     def send_sms_alert(self, threat_data):
         """Send SMS alert (simulation)"""
-        message = f"ALERT: {threat_data['type']} - {threat_data['severity']}"
-        self.logger.info(f"📱 SMS alert: {message}")
+        self.logger.info("📱 SMS alert: ALERT: %s - %s", threat_data['type'], threat_data['severity'])
         # Integrate with Twilio or similar service
 
     def trigger_incident_response(self, threat_data):
         """Trigger automated incident response"""
-        self.logger.info(f"🛡️ Incident response triggered for: {threat_data['type']}")
+        self.logger.info("🛡️ Incident response triggered for: %s", threat_data['type'])
         # This would integrate with your response system
 
     def create_dashboard_alert(self, threat_data):
         """Create alert in dashboard"""
-        self.logger.info(f"📊 Dashboard alert created: {threat_data['type']}")
+        self.logger.info("📊 Dashboard alert created: %s", threat_data['type'])
 
     def log_threat(self, threat_data):
         """Log threat for later review"""
-        self.logger.info(f"📝 Threat logged: {threat_data}")
+        # The full threat goes into the JSON record as a field; the message stays short
+        self.logger.info("📝 Threat logged: %s - %s", threat_data.get('type'), threat_data.get('severity'),
+                         extra={'threat': threat_data})
 
 
 # Test the alert system
 if __name__ == "__main__":
-    alert_system = AlertSystem()
+    from src.reporting.compliance_evaluator import ComplianceEvaluator
+
+    alert_system = AlertSystem(ComplianceEvaluator())
 
     test_threat = {
         'type': 'Ransomware',
@@ -105,4 +168,11 @@ if __name__ == "__main__":
         'recommended_action': 'Isolate machine immediately'
     }
 
-    alert_system.send_alert(test_threat)
\ No newline at end of file
+    alert_system.send_alert(test_threat)
+    # A repeat within the dedup window is folded into the next digest
+    alert_system.send_alert(test_threat)
+    alert_system.flush_alerts()
+    print("🧮 Aggregator:", alert_system.aggregator.stats)
+    print("📊 Dispatch metrics:", alert_system.get_dispatch_metrics()['sms'])
+    print("⚖️ Breach notifications:", alert_system.get_compliance_posture()['gdpr_compliance']['breach_notifications'])
+    alert_system.shutdown()
\ No newline at end of file
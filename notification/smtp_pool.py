@@ -0,0 +1,334 @@
+# src/notification/smtp_pool.py
+import logging
+import queue
+import smtplib
+import socket
+import threading
+import time
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+
+logger = logging.getLogger(__name__)
+
+# Failures that mean the session is gone and a fresh connection may succeed
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError,
+                    socket.gaierror, socket.herror)
+
+
+def needs_reconnect(error):
+    """True for session-level failures.
+
+    smtplib's errors subclass OSError, so a refused recipient or sender or
+    a rejected DATA (SMTPResponseException and its subclasses) is told
+    apart from a bare socket error: it fails one message, not the session.
+    """
+    if isinstance(error, RECONNECT_ERRORS):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def build_message(sender, recipients, subject, body, html_body=None, attachments=None):
+    """Build an alert or report email; attachments are (filename, bytes) pairs"""
+    message = MIMEMultipart('mixed')
+    message['From'] = sender
+    message['To'] = ', '.join(recipients)
+    message['Subject'] = subject
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid(domain=sender.split('@')[-1])
+
+    if html_body:
+        alternative = MIMEMultipart('alternative')
+        alternative.attach(MIMEText(body, 'plain', 'utf-8'))
+        alternative.attach(MIMEText(html_body, 'html', 'utf-8'))
+        message.attach(alternative)
+    else:
+        message.attach(MIMEText(body, 'plain', 'utf-8'))
+
+    for filename, payload in attachments or []:
+        part = MIMEApplication(payload, Name=filename)
+        part['Content-Disposition'] = f'attachment; filename="{filename}"'
+        message.attach(part)
+    return message
+
+
+class _Session:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Pool of persistent SMTP sessions shared by alerting and reporting.
+
+    A session is opened once (connect, EHLO, optional STARTTLS and login)
+    and then carries many messages; it is recycled after
+    max_messages_per_connection and health-checked with NOOP when it has
+    been idle. A message that fails on a dropped session is retried once
+    on a fresh connection.
+    """
+
+    def __init__(self, host='localhost', port=25, username=None, password=None, starttls=False, timeout=10.0,
+                 pool_size=2, max_messages_per_connection=100, idle_check=30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_check = idle_check
+
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(pool_size)
+        self.lock = threading.Lock()
+        self.stats = {'connections_opened': 0, 'messages_sent': 0, 'reconnects': 0, 'failures': 0}
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if self.starttls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.username:
+            smtp.login(self.username, self.password)
+        self._count('connections_opened')
+        return _Session(smtp)
+
+    def _close(self, session):
+        try:
+            session.smtp.quit()
+        except Exception:
+            session.smtp.close()
+
+    def _acquire(self):
+        """Take a pool slot and an idle session; None means the caller connects lazily"""
+        self.slots.acquire()
+        while True:
+            try:
+                session = self.idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - session.last_used < self.idle_check:
+                return session
+            try:
+                # Servers drop idle clients; check before trusting an old session
+                if session.smtp.noop()[0] == 250:
+                    return session
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(session)
+
+    def _release(self, session):
+        if session is not None:
+            session.last_used = time.monotonic()
+            if session.messages >= self.max_messages_per_connection:
+                self._close(session)
+            else:
+                self.idle.put(session)
+        self.slots.release()
+
+    def send_messages(self, messages):
+        """Send several messages over one pooled session; returns how many were accepted"""
+        messages = list(messages)
+        sent = 0
+        session = self._acquire()
+        try:
+            for position, message in enumerate(messages):
+                for attempt in (1, 2):
+                    try:
+                        if session is None:
+                            session = self._connect()
+                        session.smtp.send_message(message)
+                        session.messages += 1
+                        sent += 1
+                        break
+                    except (smtplib.SMTPException, OSError) as e:
+                        if not needs_reconnect(e):
+                            # Rejected by the server (recipient, size, ...); smtplib has reset the
+                            # transaction, so the session carries on with the next message
+                            self._count('failures')
+                            logger.error("SMTP server rejected message %s: %s", message.get('Subject'), e)
+                            break
+                        if session is not None:
+                            session.smtp.close()
+                            session = None
+                        if attempt == 1:
+                            self._count('reconnects')
+                            continue
+                        # The server is unreachable; fail the rest of the batch rather than retry each message
+                        self._count('failures', len(messages) - position)
+                        logger.error("SMTP delivery to %s:%s failed: %s", self.host, self.port, e)
+                        return sent
+                if session is not None and session.messages >= self.max_messages_per_connection:
+                    self._close(session)
+                    session = None
+        finally:
+            self._release(session)
+            self._count('messages_sent', sent)
+        return sent
+
+    def send_message(self, message):
+        return self.send_messages([message]) == 1
+
+    def close(self):
+        """Close all idle sessions"""
+        while True:
+            try:
+                self._close(self.idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class DigestBatcher:
+    """Collect low-priority alerts and email them as one digest per interval.
+
+    A digest that cannot be sent goes back to the front of the batch and
+    is retried at the next interval; at most `max_backlog` alerts are kept
+    while the server is unreachable, oldest dropped first.
+    """
+
+    def __init__(self, pool, sender, recipients, interval=300.0, max_items=200, max_backlog=2000,
+                 clock=time.monotonic):
+        self.pool = pool
+        self.sender = sender
+        self.recipients = recipients
+        self.interval = interval
+        self.max_items = max_items
+        self.max_backlog = max_backlog
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.items = []
+        self.window_start = clock()
+        self.retry_at = None
+        self.digests_sent = 0
+        self.failures = 0
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, threat_data):
+        """Queue an alert for the next digest; sends early when the digest is full"""
+        with self.lock:
+            self.items.append(threat_data)
+            # After a failed send, wait for the timer instead of reconnecting on every new alert
+            full = len(self.items) >= self.max_items and (self.retry_at is None or self.clock() >= self.retry_at)
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Send everything collected so far as one email; returns the number of alerts included.
+
+        Returns 0 and keeps the alerts for the next attempt when the send fails.
+        """
+        with self.lock:
+            items, self.items = self.items, []
+            self.window_start = self.clock()
+        if not items:
+            return 0
+
+        lines = []
+        for threat in items:
+            count = threat.get('suppressed_count')
+            lines.append(f"- [{threat.get('severity', 'LOW')}] {threat.get('type', 'Unknown')} "
+                         f"from {threat.get('source_ip', 'Unknown')}"
+                         + (f" x{count}" if count else '') + f": {threat.get('description', '')}")
+        message = build_message(self.sender, self.recipients,
+                                f"🧾 Threat alert digest: {len(items)} alert(s)",
+                                "Low-priority threat alerts since the last digest:\n\n" + '\n'.join(lines))
+        if not self.pool.send_message(message):
+            self._requeue(items)
+            return 0
+        with self.lock:
+            self.digests_sent += 1
+            self.retry_at = None
+        return len(items)
+
+    def _requeue(self, items):
+        with self.lock:
+            self.items[:0] = items
+            self.failures += 1
+            self.retry_at = self.clock() + self.interval
+            overflow = len(self.items) - self.max_backlog
+            if overflow > 0:
+                del self.items[:overflow]
+                self.dropped += overflow
+        logger.warning("Alert digest of %d alert(s) not sent; retrying at the next interval", len(items))
+        if overflow > 0:
+            logger.error("Alert digest backlog full - dropped %d oldest alert(s)", overflow)
+
+    def start(self):
+        """Flush on a timer from a background thread"""
+        def run():
+            while not self._stop.wait(self.interval):
+                self.flush()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='email-digests', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+# Test the SMTP pool against a local stand-in server
+if __name__ == "__main__":
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        Controller = None
+        print("⚠️ aiosmtpd not installed - pip install aiosmtpd to run the SMTP benchmark")
+
+    if Controller:
+        class CountingHandler:
+            def __init__(self):
+                self.messages = 0
+
+            async def handle_DATA(self, server, session, envelope):
+                self.messages += 1
+                return '250 Message accepted for delivery'
+
+        handler = CountingHandler()
+        controller = Controller(handler, hostname='127.0.0.1', port=8025)
+        controller.start()
+
+        n_messages = 500
+        sender, recipients = 'threat-alerts@judiciary.go.ke', ['soc@judiciary.go.ke']
+        messages = [build_message(sender, recipients, f"🚨 THREAT ALERT #{i}", f"DDoS on virtual court {i}")
+                    for i in range(n_messages)]
+
+        started = time.perf_counter()
+        for message in messages:
+            with smtplib.SMTP('127.0.0.1', 8025) as smtp:
+                smtp.send_message(message)
+        per_session = time.perf_counter() - started
+        print(f"🐢 Session per message: {n_messages / per_session:,.0f} msg/s")
+
+        pool = SMTPConnectionPool('127.0.0.1', 8025, pool_size=2)
+        started = time.perf_counter()
+        for i in range(0, n_messages, 50):
+            pool.send_messages(messages[i:i + 50])
+        pooled = time.perf_counter() - started
+        print(f"🚀 Pooled sessions: {n_messages / pooled:,.0f} msg/s "
+              f"({per_session / pooled:.1f}x), {pool.stats}")
+
+        batcher = DigestBatcher(pool, sender, recipients, max_items=100)
+        for i in range(250):
+            batcher.add({'type': 'Port Scan', 'severity': 'LOW', 'source_ip': f"41.139.0.{i}", 'description': 'Probe'})
+        batcher.stop()
+        print(f"🧾 250 low-severity alerts -> {batcher.digests_sent} digest emails")
+
+        pool.close()
+        controller.stop()
+        print(f"📬 Server received {handler.messages} messages")
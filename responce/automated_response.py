@@ -1,21 +1,147 @@
-# Create src/response/automated_response.py
+# src/responce/automated_response.py
+from src.responce.ip_blocklist import BlocklistManager
+from src.responce.playbook_engine import Playbook, PlaybookEngine, PlaybookStep
+
+
 class AutomatedResponseEngine:
-    def __init__(self):
+    def __init__(self, max_workers=8, blocklist=None):
+        # Block requests from every playbook run are batched, deduplicated and pushed as CIDRs
+        self.blocklist = blocklist or BlocklistManager()
+        self.blocklist.start()
+
+        # Precompiled action table: playbooks are bound to these callables once, not dispatched per call
+        self.action_table = {
+            'block_ip': self.block_malicious_ip,
+            'isolate_machine': self.isolate_affected_machine,
+            'disable_user': self.disable_compromised_account,
+            'capture_forensics': self.capture_forensic_snapshot,
+            'notify_security_team': self.notify_security_team
+        }
+        self.playbook_engine = PlaybookEngine(self.action_table, max_workers=max_workers)
         self.response_playbooks = self.load_playbooks()
 
-    def execute_response(self, threat_type, severity):
-        """Execute automated response based on threat"""
-        playbook = self.response_playbooks.get(threat_type, {})
-        actions = playbook.get(severity, [])
+    def load_playbooks(self):
+        """Load response playbooks as {threat_type: {severity: Playbook}}"""
+        def step(name, action, *depends_on, timeout=30.0):
+            return PlaybookStep(name, action, tuple(depends_on), timeout)
+
+        ransomware_critical = Playbook('ransomware_critical', [
+            # Snapshot memory before isolation cuts the EDR agent off
+            step('forensics', 'capture_forensics', timeout=60.0),
+            step('isolate', 'isolate_machine', 'forensics'),
+            step('block', 'block_ip'),
+            step('disable', 'disable_user'),
+            step('notify', 'notify_security_team', 'isolate', 'block', 'disable')
+        ])
+        ransomware_high = Playbook('ransomware_high', [
+            step('isolate', 'isolate_machine'),
+            step('block', 'block_ip'),
+            step('notify', 'notify_security_team', 'isolate', 'block')
+        ])
+        ddos = Playbook('ddos', [
+            step('block', 'block_ip'),
+            step('notify', 'notify_security_team', 'block')
+        ])
+        phishing = Playbook('phishing', [
+            step('disable', 'disable_user'),
+            step('block', 'block_ip'),
+            step('notify', 'notify_security_team', 'disable', 'block')
+        ])
+        exfiltration = Playbook('data_exfiltration', [
+            step('block', 'block_ip'),
+            step('forensics', 'capture_forensics', timeout=60.0),
+            step('isolate', 'isolate_machine', 'forensics'),
+            step('disable', 'disable_user'),
+            step('notify', 'notify_security_team', 'block', 'isolate', 'disable')
+        ])
+        insider = Playbook('insider_threat', [
+            step('disable', 'disable_user'),
+            step('forensics', 'capture_forensics', timeout=60.0),
+            step('notify', 'notify_security_team', 'disable', 'forensics')
+        ])
+        notify_only = Playbook('notify_only', [step('notify', 'notify_security_team')])
 
-        for action in actions:
-            self.execute_action(action)
+        playbooks = {
+            'ransomware': {'CRITICAL': ransomware_critical, 'HIGH': ransomware_high, 'MEDIUM': notify_only},
+            'ddos': {'CRITICAL': ddos, 'HIGH': ddos, 'MEDIUM': notify_only},
+            'phishing': {'CRITICAL': phishing, 'HIGH': phishing, 'MEDIUM': notify_only},
+            'data_exfiltration': {'CRITICAL': exfiltration, 'HIGH': exfiltration, 'MEDIUM': notify_only},
+            'insider_threat': {'CRITICAL': insider, 'HIGH': insider, 'MEDIUM': notify_only}
+        }
+        # Fail at startup, not mid-incident, if a playbook names an unknown action
+        for by_severity in playbooks.values():
+            for playbook in by_severity.values():
+                self.playbook_engine.compile(playbook)
+        return playbooks
 
-    def execute_action(self, action):
+    def execute_response(self, threat_type, severity, context=None):
+        """Execute automated response based on threat; returns the playbook run, or None if none applies"""
+        playbook = self.response_playbooks.get(threat_type, {}).get(str(severity).upper())
+        if playbook is None:
+            return None
+        return self.playbook_engine.run(playbook, context)
+
+    def execute_action(self, action, context=None):
         """Execute specific response action"""
-        if action == 'block_ip':
-            self.block_malicious_ip()
-        elif action == 'isolate_machine':
-            self.isolate_affected_machine()
-        elif action == 'disable_user':
-            self.disable_compromised_account()
\ No newline at end of file
+        handler = self.action_table.get(action)
+        if handler is None:
+            raise ValueError(f"Unknown response action {action!r}")
+        return handler(context or {})
+
+    def shutdown(self):
+        """Apply pending blocks and stop the workers"""
+        self.blocklist.stop()
+        self.playbook_engine.shutdown()
+
+    def block_malicious_ip(self, context):
+        """Queue the threat's source IPs for blocking; the blocklist applies them in one batched update"""
+        targets = [context['source_ip']] if context.get('source_ip') else []
+        targets.extend(context.get('source_ips', []))
+        queued = sum(self.blocklist.request_block(target) for target in targets)
+        print(f"🚫 Block requested for {len(targets)} IP(s), {queued} new")
+        return {'action': 'ip_block_queued', 'targets': len(targets), 'queued': queued}
+
+    def isolate_affected_machine(self, context):
+        """Cut the affected host off the network (simulation)"""
+        host = context.get('host', 'Unknown')
+        print(f"🔌 Isolating machine {host}")
+        return {'action': 'machine_isolated', 'target': host}
+
+    def disable_compromised_account(self, context):
+        """Disable the compromised user account (simulation)"""
+        user = context.get('user', 'Unknown')
+        print(f"🔒 Disabling account {user}")
+        return {'action': 'account_disabled', 'target': user}
+
+    def capture_forensic_snapshot(self, context):
+        """Capture memory and disk artefacts from the affected host (simulation)"""
+        host = context.get('host', 'Unknown')
+        print(f"🧪 Capturing forensic snapshot of {host}")
+        return {'action': 'forensics_captured', 'target': host}
+
+    def notify_security_team(self, context):
+        """Tell the security team what was contained (simulation)"""
+        incident_id = context.get('incident_id', 'Unknown')
+        print(f"📣 Security team notified for {incident_id}")
+        return {'action': 'team_notified', 'incident_id': incident_id}
+
+
+# Test the automated response engine
+if __name__ == "__main__":
+    engine = AutomatedResponseEngine()
+    result = engine.execute_response('ransomware', 'critical', {
+        'source_ip': '196.201.214.7',
+        'host': 'court-registry-ws-12',
+        'user': 'registry.clerk',
+        'incident_id': 'INC-20240115-103000-000000'
+    })
+    print(f"🛡️ {result['playbook']}: success {result['success']} in {result['elapsed'] * 1000:.1f}ms")
+    for name, step in result['steps'].items():
+        print(f"   {name}: {step['status']}")
+
+    # A DDoS reported by many detections becomes one blocklist update
+    botnet = [f"196.201.0.{i}" for i in range(1, 101)]
+    for _ in range(20):
+        engine.execute_response('ddos', 'HIGH', {'source_ips': botnet, 'incident_id': 'INC-20240115-103500-000000'})
+    engine.shutdown()
+    print(f"🧱 Blocklist: {[str(n) for n in engine.blocklist.active_networks()]}, stats {engine.blocklist.stats}")
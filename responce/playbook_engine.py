@@ -0,0 +1,212 @@
+# src/responce/playbook_engine.py
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+
+@dataclass(frozen=True)
+class PlaybookStep:
+    name: str
+    action: str
+    depends_on: Tuple[str, ...] = ()
+    timeout: float = 30.0
+    params: Dict = field(default_factory=dict)
+
+
+@dataclass
+class Playbook:
+    """A DAG of response steps; construction fails on unknown dependencies or cycles"""
+    name: str
+    steps: List[PlaybookStep]
+
+    def __post_init__(self):
+        self.by_name = {}
+        for step in self.steps:
+            if step.name in self.by_name:
+                raise ValueError(f"Playbook {self.name}: duplicate step {step.name!r}")
+            self.by_name[step.name] = step
+
+        self.dependents = {step.name: [] for step in self.steps}
+        for step in self.steps:
+            for dependency in step.depends_on:
+                if dependency not in self.by_name:
+                    raise ValueError(f"Playbook {self.name}: step {step.name!r} depends on unknown {dependency!r}")
+                self.dependents[dependency].append(step.name)
+
+        # Kahn's algorithm: every step must be reachable in dependency order
+        indegree = {step.name: len(step.depends_on) for step in self.steps}
+        ready = [name for name, count in indegree.items() if count == 0]
+        self.order = []
+        while ready:
+            name = ready.pop()
+            self.order.append(name)
+            for dependent in self.dependents[name]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        if len(self.order) != len(self.steps):
+            cyclic = sorted(name for name, count in indegree.items() if count)
+            raise ValueError(f"Playbook {self.name}: dependency cycle through {cyclic}")
+
+    @property
+    def critical_path_timeout(self):
+        """Worst-case run time: the longest chain of step timeouts"""
+        longest = {}
+        for name in self.order:
+            step = self.by_name[name]
+            longest[name] = step.timeout + max((longest[d] for d in step.depends_on), default=0.0)
+        return max(longest.values(), default=0.0)
+
+
+class PlaybookEngine:
+    """Run playbook DAGs on a shared worker pool.
+
+    Actions are looked up once, when a playbook is compiled against the
+    action table. A step starts as soon as all of its dependencies have
+    succeeded, so independent steps run concurrently and a playbook takes
+    about as long as its critical path. A step that fails or exceeds its
+    timeout causes its dependents to be skipped; a timed-out call is
+    abandoned, not killed, so the pool is sized with headroom for that.
+    """
+
+    def __init__(self, actions, max_workers=8):
+        self.actions = dict(actions)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='playbook')
+        self.compiled = {}
+        self.lock = threading.Lock()
+
+    def compile(self, playbook):
+        """Bind every step to its action callable; raises ValueError for actions not in the table"""
+        with self.lock:
+            compiled = self.compiled.get(id(playbook))
+            if compiled is None or compiled[0] is not playbook:
+                missing = sorted({step.action for step in playbook.steps} - self.actions.keys())
+                if missing:
+                    raise ValueError(f"Playbook {playbook.name}: no action registered for {missing}")
+                bound = {step.name: self.actions[step.action] for step in playbook.steps}
+                compiled = self.compiled[id(playbook)] = (playbook, bound)
+            return compiled[1]
+
+    def run(self, playbook, context=None):
+        """Execute a playbook; returns per-step results and the total elapsed time"""
+        bound = self.compile(playbook)
+        context = context or {}
+        started = time.perf_counter()
+
+        remaining = {step.name: len(step.depends_on) for step in playbook.steps}
+        results = {}
+        running = {}
+
+        def launch(name):
+            step = playbook.by_name[name]
+            future = self.executor.submit(bound[name], context, **step.params)
+            running[future] = (name, time.perf_counter(), time.perf_counter() + step.timeout)
+
+        def finish(name, status, step_started, result=None, error=None):
+            results[name] = {'action': playbook.by_name[name].action, 'status': status,
+                             'duration': round(time.perf_counter() - step_started, 4)}
+            if result is not None:
+                results[name]['result'] = result
+            if error is not None:
+                results[name]['error'] = str(error)
+            for dependent in playbook.dependents[name]:
+                if status == 'completed':
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        launch(dependent)
+                else:
+                    skip(dependent, f"dependency {name} {status}")
+
+        def skip(name, reason):
+            if name in results:
+                return
+            results[name] = {'action': playbook.by_name[name].action, 'status': 'skipped', 'reason': reason}
+            for dependent in playbook.dependents[name]:
+                skip(dependent, f"dependency {name} skipped")
+
+        for name, count in remaining.items():
+            if count == 0:
+                launch(name)
+
+        while running:
+            next_deadline = min(deadline for _, _, deadline in running.values())
+            done, _ = wait(running, timeout=max(0.0, next_deadline - time.perf_counter()),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                name, step_started, _ = running.pop(future)
+                try:
+                    finish(name, 'completed', step_started, result=future.result())
+                except Exception as e:
+                    finish(name, 'failed', step_started, error=e)
+
+            now = time.perf_counter()
+            for future, (name, step_started, deadline) in list(running.items()):
+                if deadline <= now and not future.done():
+                    del running[future]
+                    future.cancel()
+                    finish(name, 'timeout', step_started,
+                           error=f"timed out after {playbook.by_name[name].timeout}s")
+
+        return {
+            'playbook': playbook.name,
+            'success': all(result['status'] == 'completed' for result in results.values()),
+            'elapsed': round(time.perf_counter() - started, 4),
+            'steps': results
+        }
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+# Test the playbook engine
+if __name__ == "__main__":
+    def simulated(duration):
+        def action(context, **params):
+            time.sleep(duration)
+            return {'target': context.get('source_ip')}
+        return action
+
+    def failing(context, **params):
+        raise ConnectionError("EDR API unavailable")
+
+    engine = PlaybookEngine({
+        'capture_forensics': simulated(0.3),
+        'block_ip': simulated(0.2),
+        'disable_user': simulated(0.25),
+        'isolate_machine': simulated(0.4),
+        'notify_security_team': simulated(0.05),
+        'hung_action': simulated(5.0),
+        'failing_action': failing
+    })
+
+    containment = Playbook('ransomware_critical', [
+        PlaybookStep('forensics', 'capture_forensics', timeout=2.0),
+        PlaybookStep('block', 'block_ip', timeout=2.0),
+        PlaybookStep('disable', 'disable_user', timeout=2.0),
+        PlaybookStep('isolate', 'isolate_machine', depends_on=('forensics',), timeout=2.0),
+        PlaybookStep('notify', 'notify_security_team', depends_on=('block', 'disable', 'isolate'), timeout=2.0)
+    ])
+    serial_time = 0.3 + 0.2 + 0.25 + 0.4 + 0.05
+    result = engine.run(containment, {'source_ip': '196.201.214.7'})
+    print(f"⚡ Containment took {result['elapsed']:.2f}s (critical path 0.75s, serial {serial_time:.2f}s), "
+          f"success: {result['success']}")
+
+    degraded = Playbook('degraded', [
+        PlaybookStep('block', 'block_ip', timeout=1.0),
+        PlaybookStep('hung', 'hung_action', timeout=0.2),
+        PlaybookStep('edr', 'failing_action'),
+        PlaybookStep('isolate', 'isolate_machine', depends_on=('edr',)),
+        PlaybookStep('notify', 'notify_security_team', depends_on=('hung',))
+    ])
+    result = engine.run(degraded)
+    print(f"🧯 Degraded run in {result['elapsed']:.2f}s:",
+          {name: step['status'] for name, step in result['steps'].items()})
+
+    try:
+        Playbook('broken', [PlaybookStep('a', 'block_ip', depends_on=('b',)),
+                            PlaybookStep('b', 'block_ip', depends_on=('a',))])
+    except ValueError as e:
+        print(f"❌ Rejected: {e}")
+    engine.shutdown(wait=False)
@@ -0,0 +1,13 @@
+# tests/conftest.py
+import importlib.util
+import sys
+from pathlib import Path
+
+# The modules import each other as `src.<package>.<module>`; register the repository root as `src`
+ROOT = Path(__file__).resolve().parent.parent
+
+if 'src' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('src', ROOT / '__init__.py', submodule_search_locations=[str(ROOT)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['src'] = module
+    spec.loader.exec_module(module)
@@ -0,0 +1,18 @@
+# tests/test_compliance_evaluator.py
+from datetime import datetime, timedelta, timezone
+
+from src.database.threat_repository import to_epoch
+from src.reporting.compliance_evaluator import ComplianceEvaluator
+
+
+def test_breach_deadline_reads_naive_timestamps_as_utc():
+    evaluator = ComplianceEvaluator()
+    naive = evaluator.record_threat({'type': 'Ransomware', 'id': 1, 'timestamp': '2024-03-01 10:30:00'})
+    aware = evaluator.record_threat({'type': 'Ransomware', 'id': 2,
+                                     'timestamp': datetime(2024, 3, 1, 13, 30, tzinfo=timezone(timedelta(hours=3)))})
+
+    detected = evaluator.get_breach(naive)['detected_at']
+    assert detected == evaluator.get_breach(aware)['detected_at']
+    # The repository places the same string at the same instant
+    assert detected.timestamp() == to_epoch('2024-03-01 10:30:00')
+    assert evaluator.get_breach(naive)['deadline'] == datetime(2024, 3, 4, 10, 30, tzinfo=timezone.utc)
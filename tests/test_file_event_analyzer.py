@@ -0,0 +1,31 @@
+# tests/test_file_event_analyzer.py
+from src.threat_detection.file_event_analyzer import FileEventAnalyzer
+
+
+def _burst(analyzer, start, count=300, duration=3.0):
+    alerts = []
+    for i in range(count):
+        alert = analyzer.observe(start + duration * i / count, 'registry-ws-042', 'C:\\Cases', '.pdf', '.locked')
+        if alert:
+            alerts.append(alert)
+    return alerts
+
+
+def test_alert_reports_the_encryption_transition_after_benign_renames():
+    analyzer = FileEventAnalyzer()
+    # Twenty distinct benign renames, more than the old fixed-size table held
+    for i in range(20):
+        analyzer.observe(i * 0.5, 'registry-ws-042', 'C:\\Drafts', f".tmp{i}", '.docx')
+
+    # Inside the same window: ranked by count
+    alerts = _burst(analyzer, 10.0)
+    assert alerts[0]['indicators']['file_extension_changes'][0] == '.pdf -> .locked'
+
+
+def test_transitions_expire_with_the_window():
+    analyzer = FileEventAnalyzer(cooldown=0.0)
+    for i in range(20):
+        analyzer.observe(i * 0.1, 'registry-ws-042', 'C:\\Drafts', f".tmp{i}", '.docx')
+
+    alerts = _burst(analyzer, 100.0)
+    assert alerts[0]['indicators']['file_extension_changes'] == ['.pdf -> .locked']
@@ -0,0 +1,29 @@
+# tests/test_incident_featurizer.py
+import numpy as np
+
+from src.data_processing.incident_featurizer import IncidentFeaturizer
+
+
+def test_mixed_case_strings_and_scalar_counts_are_featurized():
+    featurizer = IncidentFeaturizer()
+    names = featurizer.feature_names
+    rows = featurizer.transform([
+        {'threat_type': 'DDoS', 'metadata': {'impact_level': 'HIGH'},
+         'indicators': {'source_ips': 5000, 'urgent_language': 'false', 'contains_links': 'true'}},
+        {'threat_type': ' Data Exfiltration', 'metadata': {'impact_level': 'critical'},
+         'indicators': {'source_ips': ['41.90.1.1', '41.90.1.2'], 'urgent_language': True, 'contains_links': 'No'}},
+        {'threat_type': 7, 'metadata': {'impact_level': 3},
+         'indicators': {'source_ips': True, 'urgent_language': None, 'contains_links': 0}},
+    ])
+
+    one_hot = rows[:, names.index('threat_type_0'):names.index('threat_type_5') + 1]
+    assert one_hot[0].tolist() == [0, 0, 0, 1, 0, 0]
+    assert one_hot[1].tolist() == [0, 0, 0, 0, 1, 0]
+    assert not one_hot[2].any()
+    assert rows[:, names.index('meta_impact_level')].tolist() == [0.75, 1.0, 0.0]
+
+    assert rows[:, names.index('urgent_language')].tolist() == [0.0, 1.0, 0.0]
+    assert rows[:, names.index('contains_links')].tolist() == [1.0, 0.0, 0.0]
+
+    source_ips = rows[:, names.index('source_ips')]
+    np.testing.assert_allclose(source_ips, np.log1p([5000, 2, 0]), rtol=1e-6)
@@ -0,0 +1,53 @@
+# tests/test_incident_store.py
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from src.database.incident_store import IncidentStore
+from src.database.threat_repository import ThreatRepository
+from src.incident_response.response_engine import IncidentResponseEngine
+
+
+def _threat(source_ip, severity_score=0.5):
+    return {'threat_detected': True, 'threat_type': 'ddos', 'severity_score': severity_score, 'source_ip': source_ip}
+
+
+def test_quiet_store_flushes_on_the_timer(tmp_path):
+    db_path = str(tmp_path / 'incidents.db')
+    store = IncidentStore(db_path=db_path, flush_interval=0.05)
+    store.add({'incident_id': 'INC-1', 'category': 'ddos'})
+
+    time.sleep(0.3)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM incidents").fetchone() == (1,)
+    conn.close()
+    store.close()
+
+
+def test_engine_close_persists_and_restart_correlates(tmp_path):
+    config = SimpleNamespace(DATABASE_PATH=str(tmp_path / 'incidents.db'))
+    engine = IncidentResponseEngine(config)
+    for i in range(5):
+        engine.execute_response(_threat(f"196.201.{i}.7", severity_score=0.9))
+    assert len(engine.incident_log) == 5
+    engine.close()
+
+    restarted = IncidentResponseEngine(config)
+    assert len(restarted.get_open_incidents()) == 5
+    incident, created = restarted.correlator.correlate(_threat('196.201.3.99'))
+    assert not created and incident['event_count'] == 2
+    # The incident alerted before the restart, so a severe repeat stays quiet
+    assert restarted.execute_response(_threat('196.201.3.100', severity_score=0.95)) == []
+    restarted.close()
+
+
+def test_store_uses_its_own_connection(tmp_path):
+    repo = ThreatRepository(str(tmp_path / 'threats.db'))
+    store = IncidentStore(repository=repo)
+    assert store.conn is not repo.conn
+    store.add({'incident_id': 'INC-1', 'category': 'ddos'})
+    store.close()
+
+    # The caller's repository stays open and sees the flushed incident
+    assert repo.conn.execute("SELECT COUNT(*) FROM incidents").fetchone() == (1,)
+    repo.close()
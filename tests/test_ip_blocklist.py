@@ -0,0 +1,87 @@
+# tests/test_ip_blocklist.py
+import ipaddress
+import threading
+import time
+
+from src.responce.ip_blocklist import BlocklistManager, PrefixTrie
+
+
+class FlakyBackend:
+    def __init__(self, failures):
+        self.failures = failures
+        self.applied = None
+
+    def apply(self, networks):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("nft: Could not process rule")
+        self.applied = [str(network) for network in networks]
+
+
+class BlockingBackend:
+    """Holds the first update until released, so a second flush can race it"""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.applied = []
+
+    def apply(self, networks):
+        if not self.applied and not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        self.applied.append([str(network) for network in networks])
+
+
+def test_expired_prefix_does_not_hide_active_host():
+    trie = PrefixTrie(32)
+    trie.insert(ipaddress.ip_network('196.201.14.0/24'), 100.0)
+    trie.insert(ipaddress.ip_network('196.201.14.7/32'), 500.0)
+    address = int(ipaddress.ip_address('196.201.14.7'))
+
+    assert trie.match(address) == 500.0
+    assert trie.match(address, now=200.0) == 500.0
+    assert trie.match(int(ipaddress.ip_address('196.201.14.8')), now=200.0) is None
+
+    manager = BlocklistManager(FlakyBackend(0), default_ttl=100.0, clock=lambda: 0.0)
+    manager.request_block('196.201.14.0/24', now=0.0)
+    manager.request_block('196.201.14.7', ttl=1000.0, now=0.0)
+    manager.flush(now=0.0)
+    # Until the next flush removes it, the lapsed /24 is still in the trie
+    assert manager.is_blocked('196.201.14.7', now=200.0)
+    assert not manager.is_blocked('196.201.14.8', now=200.0)
+
+
+def test_failed_backend_update_is_retried():
+    backend = FlakyBackend(1)
+    manager = BlocklistManager(backend, clock=lambda: 0.0)
+    manager.request_block('41.139.0.9', now=0.0)
+
+    assert manager.flush(now=0.0) == 0
+    assert backend.applied is None and manager.stats['sync_failures'] == 1
+
+    # Nothing new was requested, but the backend still lacks the block
+    assert manager.flush(now=1.0) == 1
+    assert backend.applied == ['41.139.0.9/32'] and manager.stats['syncs'] == 1
+
+
+def test_concurrent_flushes_apply_the_newest_set_last():
+    backend = BlockingBackend()
+    manager = BlocklistManager(backend, clock=lambda: 0.0)
+    manager.request_block('41.139.0.9', now=0.0)
+    first = threading.Thread(target=manager.flush, kwargs={'now': 0.0})
+    first.start()
+    assert backend.entered.wait(5)
+
+    # A playbook worker blocks another source while the timer's update is still in flight
+    manager.request_block('196.201.14.7', now=0.0)
+    second = threading.Thread(target=manager.flush, kwargs={'now': 0.0})
+    second.start()
+    time.sleep(0.2)
+    backend.release.set()
+    first.join(5)
+    second.join(5)
+
+    expected = ['41.139.0.9/32', '196.201.14.7/32']
+    assert backend.applied[-1] == expected
+    assert manager.synced == manager.active_networks()
@@ -0,0 +1,34 @@
+# tests/test_lookalike_domains.py
+import pytest
+
+from src.threat_detection.lookalike_domains import open_matcher
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    matcher = open_matcher(str(tmp_path / 'lookalike_index.bin'))
+    yield matcher
+    matcher.index.close()
+
+
+@pytest.mark.parametrize('domain, brand, technique', [
+    ('paypa1-login.com', 'paypal.com', 'homoglyph'),
+    ('xn--pypal-4ve.com', 'paypal.com', 'homoglyph'),
+    ('z00m.us', 'zoom.us', 'homoglyph'),
+    ('apple-verify.net', 'apple.com', 'brand_embedding'),
+    ('judiciary.go.ke.fake', 'judiciary.go.ke', 'brand_embedding'),
+    ('judlciary.go.ke', 'judiciary.go.ke', 'typosquat'),
+    ('micros0ftt.com', 'microsoft.com', 'typosquat'),
+])
+def test_lookalikes_are_flagged(matcher, domain, brand, technique):
+    finding = matcher.check(domain)
+    assert finding and (finding['brand'], finding['technique']) == (brand, technique)
+
+
+@pytest.mark.parametrize('domain', [
+    # One edit from a short brand, or a hyphenated part one edit away
+    'mail-server.org', 'room.com', 'boom.us', 'ample.com', 'apply-now.com', 'applied.com', 'goggle-maps.com',
+    'efiling.judiciary.go.ke', 'kenyalaw.org', 'nation.africa',
+])
+def test_ordinary_domains_are_clean(matcher, domain):
+    assert matcher.check(domain) is None
@@ -0,0 +1,23 @@
+# tests/test_report_cache.py
+import sqlite3
+
+from src.database.threat_repository import ThreatRepository
+from src.reporting.threat_reporter import ThreatReporter
+
+
+def test_cache_reads_day_versions_from_the_repository(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    repo = ThreatRepository(str(tmp_path / 'threats.db'))
+    repo.log_threat({'type': 'Phishing', 'severity': 'HIGH', 'source_ip': '41.90.1.1',
+                     'description': 'Credential lure', 'confidence': 0.9, 'timestamp': '2024-03-01 10:00:00'})
+    cache = ThreatReporter(repo).report_cache
+
+    assert cache.day_versions('2024-03-01', '2024-03-01') == {'2024-03-01': [1, 0]}
+    cache.get_report('2024-03-01')
+    assert cache.is_current('2024-03-01')
+    cache.get_report('2024-03-01')
+    assert cache.stats == {'hits': 1, 'incremental': 0, 'rebuilds': 1}
+
+    # A raw connection has no repository to keep day versions, so there is no cache
+    assert ThreatReporter(sqlite3.connect(str(tmp_path / 'threats.db'))).report_cache is None
+    repo.close()
@@ -0,0 +1,80 @@
+# tests/test_smtp_pool.py
+import socket
+
+import pytest
+
+pytest.importorskip('aiosmtpd')
+
+from aiosmtpd.controller import Controller
+
+from src.notification.smtp_pool import DigestBatcher, SMTPConnectionPool, build_message
+
+SENDER = 'threat-alerts@judiciary.go.ke'
+
+
+class RefusingHandler:
+    """Accepts mail except for one refused recipient"""
+
+    def __init__(self, refused):
+        self.refused = refused
+        self.messages = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == self.refused:
+            return '550 5.1.1 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return '250 Message accepted for delivery'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RefusingHandler('gone@judiciary.go.ke')
+    controller = Controller(handler, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    yield handler, controller.port
+    controller.stop()
+
+
+def test_batch_continues_past_refused_recipient(smtp_server):
+    handler, port = smtp_server
+    pool = SMTPConnectionPool('127.0.0.1', port)
+    messages = [build_message(SENDER, ['gone@judiciary.go.ke' if i == 1 else 'soc@judiciary.go.ke'],
+                              f"🚨 THREAT ALERT #{i}", 'DDoS on virtual court') for i in range(7)]
+
+    assert pool.send_messages(messages) == 6
+    pool.close()
+
+    assert handler.messages == 6
+    assert pool.stats['failures'] == 1
+    # A refused recipient is not a dead session
+    assert pool.stats['reconnects'] == 0 and pool.stats['connections_opened'] == 1
+
+
+def test_digest_is_kept_when_server_unreachable():
+    pool = SMTPConnectionPool('127.0.0.1', _free_port(), timeout=1.0)
+    now = [0.0]
+    batcher = DigestBatcher(pool, SENDER, ['soc@judiciary.go.ke'], interval=60.0, max_items=10, max_backlog=15,
+                            clock=lambda: now[0])
+
+    for i in range(10):
+        batcher.add({'type': 'Port Scan', 'severity': 'LOW', 'source_ip': f"41.139.0.{i}"})
+    assert batcher.failures == 1 and len(batcher.items) == 10
+
+    # Until the retry time, a full batch does not reconnect on every alert
+    for i in range(10, 20):
+        batcher.add({'type': 'Port Scan', 'severity': 'LOW', 'source_ip': f"41.139.0.{i}"})
+    assert batcher.failures == 1 and len(batcher.items) == 20
+
+    assert batcher.flush() == 0
+    assert len(batcher.items) == 15 and batcher.dropped == 5
+    assert batcher.items[-1]['source_ip'] == '41.139.0.19'
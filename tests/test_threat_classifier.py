@@ -0,0 +1,59 @@
+# tests/test_threat_classifier.py
+import os
+
+import pytest
+
+pytest.importorskip('pyarrow')
+pytest.importorskip('sklearn')
+
+from src.database.columnar_export import load_threats_table
+from src.database.threat_repository import ThreatRepository
+from src.ml.threat_classifier import CLASSIFIER_FEATURES, MLThreatClassifier, features_from_export
+
+
+def _logged_repository(path):
+    repo = ThreatRepository(str(path))
+    threats = []
+    for i in range(400):
+        if i % 2:
+            threats.append({'type': 'Phishing', 'severity': 'HIGH', 'source_ip': f"41.90.{i % 7}.1",
+                            'description': 'URGENT: verify your account at http://judiciary-portal.co.ke.login.example/x',
+                            'confidence': 0.9, 'timestamp': f"2024-03-01 10:{i % 60:02d}:00"})
+        else:
+            threats.append({'type': 'Scan', 'severity': 'LOW', 'source_ip': '10.0.0.5',
+                            'description': 'Routine port scan', 'confidence': 0.2,
+                            'timestamp': f"2024-03-01 11:{i % 60:02d}:00"})
+    repo.log_threats(threats)
+    return repo
+
+
+@pytest.mark.parametrize('suffix', ['parquet', 'arrow'])
+def test_export_load_and_train_end_to_end(tmp_path, suffix):
+    repo = _logged_repository(tmp_path / 'threats.db')
+    export_path = tmp_path / f"threats.{suffix}"
+    assert repo.export_columnar(str(export_path)) == 400
+    repo.close()
+
+    classifier = MLThreatClassifier()
+    model_path = tmp_path / 'models' / 'threat_classifier.pkl'
+    classifier.train_on_historical_data(str(export_path), model_path=str(model_path))
+
+    assert os.path.exists(model_path)
+    phishing = features_from_export(load_threats_table(str(export_path))).iloc[1]
+    assert classifier.predict_threat(phishing[CLASSIFIER_FEATURES].tolist()) > 0.5
+
+
+def test_features_from_export_maps_the_export_schema(tmp_path):
+    repo = _logged_repository(tmp_path / 'threats.db')
+    repo.export_columnar(str(tmp_path / 'threats.parquet'))
+    repo.close()
+
+    features = features_from_export(load_threats_table(str(tmp_path / 'threats.parquet')))
+
+    assert list(features.columns) == CLASSIFIER_FEATURES + ['is_threat']
+    phishing, scan = features.iloc[1], features.iloc[0]
+    assert phishing['suspicious_keywords'] >= 2 and phishing['url_length'] > 20
+    assert scan['suspicious_keywords'] == 0 and scan['url_length'] == 0
+    # 200 port-scan rows from one IP, spread over 30 minutes
+    assert scan['request_rate'] > 1 and scan['source_ip_count'] == 1
+    assert (phishing['is_threat'], scan['is_threat']) == (1, 0)
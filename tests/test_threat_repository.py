@@ -0,0 +1,16 @@
+# tests/test_threat_repository.py
+from datetime import datetime, timedelta, timezone
+
+from src.database.threat_repository import epoch_to_timestamp, format_timestamp, to_epoch
+
+
+def test_aware_and_naive_timestamps_share_one_utc_convention():
+    nairobi = timezone(timedelta(hours=3))
+    aware = datetime(2024, 3, 1, 13, 30, tzinfo=nairobi)
+
+    # Detection emits aware UTC ISO strings; naive values are already UTC
+    assert format_timestamp(aware.astimezone(timezone.utc).isoformat()) == '2024-03-01 10:30:00'
+    assert format_timestamp(aware) == '2024-03-01 10:30:00'
+    assert format_timestamp('2024-03-01T10:30:00') == '2024-03-01 10:30:00'
+    assert to_epoch('2024-03-01 10:30:00') == to_epoch(aware) == aware.timestamp()
+    assert epoch_to_timestamp(aware.timestamp()) == '2024-03-01 10:30:00'
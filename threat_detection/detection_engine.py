@@ -1,6 +1,6 @@
 # src/threat_detection/detection_engine.py
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any
 import sys
 import os
@@ -21,13 +21,21 @@ except ImportError as e:
     REFLECTIVE_AI_AVAILABLE = False
     print(f"⚠️  Reflective AI module not available: {e}")
 
+from src.data_processing.incident_featurizer import IncidentFeaturizer
+from src.threat_detection.traffic_sketches import TrafficAnalyzer
+
 
 class ThreatDetectionEngine:
-    def __init__(self, model, config, data_processor):
+    def __init__(self, model, config, data_processor, traffic_analyzer=None):
         self.model = model
         self.config = config
         self.data_processor = data_processor
         self.threat_history = []
+        # Fixed-memory heavy-hitter and unique-source sketches over observed traffic events
+        self.traffic_analyzer = traffic_analyzer or TrafficAnalyzer(
+            window=getattr(config, 'TRAFFIC_WINDOW', 60.0))
+        # Raw incident dicts -> model features; shared with the data processor when it has one
+        self.featurizer = getattr(data_processor, 'featurizer', None) or IncidentFeaturizer()
         self.reflective_enabled = REFLECTIVE_AI_AVAILABLE
 
         # Create a safe fallback method if reflective AI is not available
@@ -79,37 +87,72 @@ class ThreatDetectionEngine:
         enhanced_detector = MockEnhancedDetector()
         self.reflective_enabled = True  # Enable with fallback
 
+    def observe_traffic(self, payload):
+        """Feed a traffic event (source_ips, request_rate, target_endpoints) into the sliding-window sketches"""
+        try:
+            self.traffic_analyzer.observe(payload)
+        except Exception as e:
+            print(f"❌ Traffic observation failed: {e}")
+
+    def get_traffic_features(self) -> Dict:
+        """Current window's unique sources, request rate and heavy hitters"""
+        return self.traffic_analyzer.features()
+
     def detect_threat(self, features):
         """Enhanced threat detection with reflective AI capabilities"""
         # Original detection logic
         processed_features = self.data_processor.scaler.transform([features])
         predictions = self.model.predict(processed_features, verbose=0)
         threat_detection, threat_severity, response_recommendation = predictions
-
-        # Original threat result
+        return self._build_threat_result(threat_detection, threat_severity, response_recommendation, features)
+
+    def detect_incidents(self, incidents):
+        """Featurize raw incident dicts (indicators plus metadata) and score the whole batch in one model call"""
+        incidents = list(incidents)
+        if not incidents:
+            return []
+        for incident in incidents:
+            if isinstance(incident.get('indicators'), dict) and incident['indicators'].get('source_ips'):
+                self.observe_traffic(incident)
+
+        features = self.featurizer.transform(incidents)
+        processed_features = self.data_processor.scaler.transform(features)
+        threat_detection, threat_severity, response_recommendation = self.model.predict(processed_features, verbose=0)
+        # Row slices keep the (1, k) shape the per-incident interpreters expect
+        return [self._build_threat_result(threat_detection[i:i + 1], threat_severity[i:i + 1],
+                                          response_recommendation[i:i + 1], features[i], incidents[i])
+                for i in range(len(incidents))]
+
+    def detect_incident(self, incident):
+        """Detect a threat from one raw incident dict"""
+        return self.detect_incidents([incident])[0]
+
+    def _build_threat_result(self, threat_detection, threat_severity, response_recommendation, features,
+                             incident=None):
+        """Threat result for one row of model output; `incident` is the raw dict it was featurized from"""
         threat_result = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
             'threat_detected': np.any(threat_detection > 0.5),
             'threat_categories': self._interpret_threat_categories(threat_detection),
             'severity_score': float(threat_severity[0][0]),
             'recommended_response': self._interpret_response(response_recommendation),
             'original_confidence': float(np.max(threat_detection)),
-            'processing_time': datetime.now().isoformat(),
+            'processing_time': datetime.now(timezone.utc).isoformat(),
             'detection_method': 'ml_model'
         }
 
         # Enhance with reflective AI if available
         if self.reflective_enabled:
-            threat_result = self._enhance_with_reflective_ai(threat_result, features)
+            threat_result = self._enhance_with_reflective_ai(threat_result, features, incident)
 
         self.threat_history.append(threat_result)
         return threat_result
 
-    def _enhance_with_reflective_ai(self, threat_result: Dict, features) -> Dict:
+    def _enhance_with_reflective_ai(self, threat_result: Dict, features, incident=None) -> Dict:
         """Enhance detection results with reflective AI insights"""
         try:
             # Convert features to threat data format for reflective model
-            threat_data = self._convert_to_threat_data(threat_result, features)
+            threat_data = self._convert_to_threat_data(threat_result, features, incident)
 
             # Get reflective insights - USE CORRECT METHOD
             enhanced_result = enhanced_detector.detect_threat_with_reflection(threat_data)
@@ -135,7 +178,7 @@ class ThreatDetectionEngine:
 
         return threat_result
 
-    def _convert_to_threat_data(self, threat_result: Dict, features) -> Dict:
+    def _convert_to_threat_data(self, threat_result: Dict, features, incident=None) -> Dict:
         """Convert ML model output to threat data format for reflective AI"""
         # Determine threat type from categories
         threat_categories = threat_result['threat_categories']
@@ -164,20 +207,38 @@ class ThreatDetectionEngine:
         else:
             severity = 'low'
 
-        return {
+        threat_data = {
             'threat_type': threat_type,
             'severity': severity,
             'confidence': threat_result['original_confidence'],
             'categories': [cat['category'] for cat in threat_categories],
             'indicators': self._extract_indicators(features),
             'response_action': threat_result['recommended_response']['action'],
-            'timestamp': threat_result['timestamp']
+            'timestamp': threat_result['timestamp'],
+            'traffic_features': self.traffic_analyzer.features()
         }
+        # The threat's own sources are its source count; the window-wide estimate covers all traffic
+        # and is kept apart, as context for volumetric threats only
+        source_ips = self._incident_source_ips(incident)
+        if source_ips:
+            threat_data['source_count'] = len(set(source_ips))
+        if threat_type == 'ddos':
+            threat_data['window_unique_sources'] = max(1, threat_data['traffic_features']['unique_sources'])
+        return threat_data
+
+    @staticmethod
+    def _incident_source_ips(incident) -> list:
+        if not incident:
+            return []
+        indicators = incident.get('indicators')
+        if isinstance(indicators, dict) and indicators.get('source_ips'):
+            return list(indicators['source_ips'])
+        return list(incident.get('source_ips') or [])
 
     def _extract_indicators(self, features) -> list:
         """Extract threat indicators from features"""
         indicators = []
-        feature_names = getattr(self.config, 'FEATURE_NAMES', [f'feature_{i}' for i in range(len(features))])
+        feature_names = getattr(self.config, 'FEATURE_NAMES', None) or self.featurizer.feature_names
 
         # Simple indicator extraction based on feature values
         for i, value in enumerate(features):
@@ -224,7 +285,8 @@ class ThreatDetectionEngine:
             'data_processor_ready': self.data_processor is not None,
             'total_detections': len(self.threat_history),
             'reflective_ai_enabled': self.reflective_enabled,
-            'reflective_ai_available': REFLECTIVE_AI_AVAILABLE
+            'reflective_ai_available': REFLECTIVE_AI_AVAILABLE,
+            'traffic_unique_sources': self.traffic_analyzer.unique_sources()
         }
 
         if self.reflective_enabled:
@@ -257,6 +319,6 @@ class ThreatDetectionEngine:
 
 
 # Backward compatibility - if you have existing code that uses these
-def create_detection_engine(model, config, data_processor):
+def create_detection_engine(model, config, data_processor, traffic_analyzer=None):
     """Factory function for backward compatibility"""
-    return ThreatDetectionEngine(model, config, data_processor)
\ No newline at end of file
+    return ThreatDetectionEngine(model, config, data_processor, traffic_analyzer)
\ No newline at end of file
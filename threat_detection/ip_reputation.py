@@ -0,0 +1,326 @@
+# src/threat_detection/ip_reputation.py
+import ipaddress
+import os
+import socket
+import threading
+
+import numpy as np
+
+DEFAULT_FEED_DIR = 'threat_feeds'
+FEED_EXTENSIONS = ('.txt', '.csv', '.netset')
+
+
+class _Node:
+    __slots__ = ('bits', 'length', 'value', 'children')
+
+    def __init__(self, bits, length, value=None):
+        self.bits = bits
+        self.length = length
+        self.value = value
+        self.children = [None, None]
+
+
+class RadixTrie:
+    """Path-compressed binary trie with longest-prefix match over integer addresses.
+
+    Each node stores the full prefix it represents, so chains of
+    single-child nodes collapse into one edge and a lookup visits only
+    the branching points on the way down.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.root = _Node(0, 0)
+        self.size = 0
+
+    def insert(self, address, prefixlen, value):
+        width = self.width
+        bits = address >> (width - prefixlen)
+        node = self.root
+        while True:
+            if node.length == prefixlen:
+                if node.value is None:
+                    self.size += 1
+                node.value = value
+                return
+            branch = (address >> (width - node.length - 1)) & 1
+            child = node.children[branch]
+            if child is None:
+                node.children[branch] = _Node(bits, prefixlen, value)
+                self.size += 1
+                return
+
+            shared = min(child.length, prefixlen)
+            diff = (bits >> (prefixlen - shared)) ^ (child.bits >> (child.length - shared))
+            common = shared - diff.bit_length()
+            if common == child.length:
+                node = child
+                continue
+
+            # The new prefix diverges inside the child's edge: split it
+            split = _Node(bits >> (prefixlen - common), common)
+            split.children[(child.bits >> (child.length - common - 1)) & 1] = child
+            node.children[branch] = split
+            if common == prefixlen:
+                split.value = value
+            else:
+                split.children[(bits >> (prefixlen - common - 1)) & 1] = _Node(bits, prefixlen, value)
+            self.size += 1
+            return
+
+    def lookup(self, address):
+        """Value of the longest stored prefix containing the address, or None"""
+        width = self.width
+        node = self.root
+        best = node.value
+        while node.length < width:
+            child = node.children[(address >> (width - node.length - 1)) & 1]
+            if child is None or (address >> (width - child.length)) != child.bits:
+                break
+            if child.value is not None:
+                best = child.value
+            node = child
+        return best
+
+    def prefixes(self):
+        """Yield (network address, prefixlen, value) for every stored prefix"""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.value is not None:
+                yield node.bits << (self.width - node.length), node.length, node.value
+            stack.extend(child for child in node.children if child is not None)
+
+
+class ReputationSnapshot:
+    """Immutable lookup state built from one load of the feeds"""
+
+    def __init__(self, entries, sources):
+        self.entries = entries
+        self.sources = sources
+        self.tries = {4: RadixTrie(32), 6: RadixTrie(128)}
+        for index, entry in enumerate(entries):
+            network = entry['network']
+            self.tries[network.version].insert(int(network.network_address), network.prefixlen, index)
+        self.starts, self.values = self._flatten(self.tries[4])
+
+    @staticmethod
+    def _flatten(trie):
+        """Turn IPv4 longest-prefix matches into sorted disjoint intervals for np.searchsorted.
+
+        CIDR blocks either nest or are disjoint, so one sweep in address
+        order with a stack of enclosing blocks yields every boundary.
+        """
+        starts, values = [0], [-1]
+
+        def emit(position, value):
+            if position >= 1 << 32:
+                return
+            if starts[-1] == position:
+                values[-1] = value
+                if len(values) > 1 and values[-2] == value:
+                    starts.pop()
+                    values.pop()
+            elif values[-1] != value:
+                starts.append(position)
+                values.append(value)
+
+        stack = [(1 << 32, -1)]
+        for start, prefixlen, value in sorted(trie.prefixes()):
+            while stack[-1][0] <= start:
+                end, _ = stack.pop()
+                emit(end, stack[-1][1])
+            emit(start, value)
+            stack.append((start + (1 << (32 - prefixlen)), value))
+        while len(stack) > 1:
+            end, _ = stack.pop()
+            emit(end, stack[-1][1])
+        return np.array(starts, dtype=np.uint32), np.array(values, dtype=np.int32)
+
+    def lookup_ipv4_array(self, addresses):
+        """Entry index per address (-1 for no match) for a uint32 array"""
+        positions = np.searchsorted(self.starts, np.asarray(addresses, dtype=np.uint32), side='right') - 1
+        return self.values[positions]
+
+
+def parse_feed_line(line, feed):
+    """Parse `cidr[,category[,score]]`; returns an entry dict, or None for blanks and comments"""
+    line = line.split('#', 1)[0].strip()
+    if not line:
+        return None
+    fields = [field.strip() for field in line.replace(';', ',').split(',')]
+    network = ipaddress.ip_network(fields[0], strict=False)
+    return {
+        'network': network,
+        'feed': feed,
+        'category': fields[1] if len(fields) > 1 and fields[1] else 'malicious',
+        'score': float(fields[2]) if len(fields) > 2 and fields[2] else 1.0
+    }
+
+
+def ipv4_to_uint32(addresses):
+    """Pack dotted-quad strings into a uint32 array; raises OSError on any non-IPv4 string"""
+    return np.frombuffer(b''.join(socket.inet_aton(address) for address in addresses), dtype='>u4').astype(np.uint32)
+
+
+class IPReputationService:
+    """CIDR reputation lookups for detection enrichment, loaded from local feed files.
+
+    A feed is a text file of `cidr[,category[,score]]` lines. The loaded
+    state is an immutable ReputationSnapshot; reload() builds a new one
+    and swaps the reference, so readers never see a half-loaded feed and
+    need no lock.
+    """
+
+    def __init__(self, feed_paths=None, feed_dir=DEFAULT_FEED_DIR):
+        self.feed_paths = feed_paths
+        self.feed_dir = feed_dir
+        self.reload_lock = threading.Lock()
+        self.snapshot = ReputationSnapshot([], {})
+        self.reload()
+
+    def _feed_files(self):
+        if self.feed_paths is not None:
+            return list(self.feed_paths)
+        if not self.feed_dir or not os.path.isdir(self.feed_dir):
+            return []
+        return sorted(os.path.join(self.feed_dir, name) for name in os.listdir(self.feed_dir)
+                      if name.endswith(FEED_EXTENSIONS))
+
+    def reload(self):
+        """Re-read every feed and atomically swap in the new snapshot; returns the number of entries"""
+        with self.reload_lock:
+            entries, sources, invalid = {}, {}, 0
+            for path in self._feed_files():
+                feed = os.path.splitext(os.path.basename(path))[0]
+                try:
+                    sources[path] = os.path.getmtime(path)
+                    with open(path, encoding='utf-8') as f:
+                        for line in f:
+                            try:
+                                entry = parse_feed_line(line, feed)
+                            except ValueError:
+                                invalid += 1
+                                continue
+                            # The same CIDR in several feeds keeps its highest score
+                            if entry and entry['score'] >= entries.get(entry['network'], {'score': -1})['score']:
+                                entries[entry['network']] = entry
+                except OSError as e:
+                    print(f"⚠️ Cannot read reputation feed {path}: {e}")
+
+            self.snapshot = ReputationSnapshot(list(entries.values()), sources)
+            if invalid:
+                print(f"⚠️ Skipped {invalid} invalid reputation feed line(s)")
+            return len(entries)
+
+    def reload_if_changed(self):
+        """Reload when a feed file was added, removed or modified; returns True if it reloaded"""
+        current = {}
+        for path in self._feed_files():
+            try:
+                current[path] = os.path.getmtime(path)
+            except OSError:
+                pass
+        if current == self.snapshot.sources:
+            return False
+        self.reload()
+        return True
+
+    def _public_entry(self, entry):
+        return {'cidr': str(entry['network']), 'feed': entry['feed'], 'category': entry['category'],
+                'score': entry['score']}
+
+    def lookup(self, ip):
+        """Reputation for one address, or None"""
+        snapshot = self.snapshot
+        try:
+            address = ipaddress.ip_address(str(ip).strip())
+        except ValueError:
+            return None
+        index = snapshot.tries[address.version].lookup(int(address))
+        return None if index is None else self._public_entry(snapshot.entries[index])
+
+    def lookup_many(self, ips):
+        """Reputation per address as a list aligned with `ips`; IPv4 goes through the vectorised path"""
+        ips = [str(ip).strip() for ip in ips]
+        snapshot = self.snapshot
+        try:
+            indexes = snapshot.lookup_ipv4_array(ipv4_to_uint32(ips)).tolist()
+        except OSError:
+            # Mixed or malformed input: fall back to per-address trie lookups
+            return [self.lookup(ip) for ip in ips]
+        entries = snapshot.entries
+        return [None if index < 0 else self._public_entry(entries[index]) for index in indexes]
+
+    def enrich_incident(self, incident):
+        """Attach reputation hits for every address an incident mentions, under incident['ip_reputation']"""
+        indicators = incident.get('indicators') or {}
+        candidates = list(indicators.get('source_ips', []))
+        for key in ('source_ip', 'destination_ip'):
+            if indicators.get(key):
+                candidates.append(indicators[key])
+            if incident.get(key):
+                candidates.append(incident[key])
+        candidates.extend(connection.rsplit(':', 1)[0] for connection in indicators.get('network_connections', []))
+
+        unique = list(dict.fromkeys(candidates))
+        hits = {ip: entry for ip, entry in zip(unique, self.lookup_many(unique)) if entry}
+        incident['ip_reputation'] = {
+            'checked': len(unique),
+            'matched': len(hits),
+            'max_score': max((entry['score'] for entry in hits.values()), default=0.0),
+            'categories': sorted({entry['category'] for entry in hits.values()}),
+            'hits': hits
+        }
+        return incident
+
+
+# Test the IP reputation service
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    feed_dir = tempfile.mkdtemp()
+    with open(os.path.join(feed_dir, 'botnets.txt'), 'w') as f:
+        f.write("# Botnet ranges seen in the virtual-courts DDoS\n"
+                "185.130.0.0/16,ddos_botnet,0.9\n196.201.0.0/24,ddos_botnet,0.7\n41.139.0.0/26,ddos_botnet,0.6\n")
+    with open(os.path.join(feed_dir, 'known_bad.csv'), 'w') as f:
+        f.write("185.130.5.231,ransomware_c2,1.0\n45.77.56.124,ransomware_c2,0.95\n203.23.186.55,phishing,0.8\n"
+                "192.168.1.666,broken\n2001:db8:bad::/48,scanner,0.5\n")
+        # A realistic feed size: 50k scattered /24s and single hosts
+        rng = np.random.default_rng(1)
+        for value in rng.integers(1 << 24, 223 << 24, size=50000):
+            f.write(f"{ipaddress.IPv4Address(int(value) & 0xFFFFFF00)}/24,spam,0.3\n")
+
+    started = time.perf_counter()
+    service = IPReputationService(feed_dir=feed_dir)
+    print(f"📥 Loaded {len(service.snapshot.entries):,} prefixes "
+          f"({len(service.snapshot.starts):,} intervals) in {time.perf_counter() - started:.2f}s")
+    print("🔍", service.lookup('185.130.5.231'), service.lookup('2001:db8:bad::1'), service.lookup('8.8.8.8'))
+
+    # A 10k-source DDoS payload
+    source_ips = [f"{a}.{b}.{c}.{d}" for a, b, c, d in
+                  zip(rng.choice([185, 196, 41, 102], 10000), rng.integers(0, 256, 10000),
+                      rng.integers(0, 4, 10000), rng.integers(1, 255, 10000))]
+    incident = {'threat_type': 'ddos', 'indicators': {'source_ips': source_ips}}
+    started = time.perf_counter()
+    service.enrich_incident(incident)
+    batch = time.perf_counter() - started
+    started = time.perf_counter()
+    for ip in source_ips:
+        service.lookup(ip)
+    single = time.perf_counter() - started
+    summary = {key: value for key, value in incident['ip_reputation'].items() if key != 'hits'}
+    print(f"⚡ Enriched 10k-IP payload in {batch * 1000:.1f}ms ({batch / 1e4 * 1e6:.2f}µs/IP; "
+          f"trie one-by-one {single / 1e4 * 1e6:.2f}µs/IP): {summary}")
+
+    addresses = rng.integers(0, 1 << 32, size=1000000, dtype=np.uint64).astype(np.uint32)
+    started = time.perf_counter()
+    matches = service.snapshot.lookup_ipv4_array(addresses)
+    array_time = time.perf_counter() - started
+    print(f"🧮 1M uint32 lookups in {array_time * 1000:.1f}ms ({array_time:.3f}µs/IP), {(matches >= 0).sum():,} hits")
+
+    time.sleep(0.01)
+    with open(os.path.join(feed_dir, 'botnets.txt'), 'a') as f:
+        f.write("102.0.0.0/8,ddos_botnet,0.8\n")
+    print(f"🔄 Hot reload: {service.reload_if_changed()}, 102.1.2.3 -> {service.lookup('102.1.2.3')}")
@@ -2,7 +2,7 @@
 import requests
 import json
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 def simulate_judicial_phishing_campaign():
@@ -88,7 +88,7 @@ def simulate_judicial_phishing_campaign():
             },
             "metadata": {
                 "source_ip": "192.168.1.200",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
                 "target_department": scenario['target_role'],
                 "campaign_identifier": "Operation_Judicial_Compromise_2024",